@@ -0,0 +1,135 @@
+"""Times every day's solutions and tracks them between runs
+
+Each part is run once to warm up, then timed over repeated runs on a fresh
+copy of its parsed input, and run once more under tracemalloc for its peak
+memory. Results are appended to a JSON history file, and any part whose
+best time is more than the threshold slower than the last recorded run is
+flagged as a regression.
+
+    python benchmark.py [-n REPEAT] [-t THRESHOLD] [DAY ...]
+"""
+
+import argparse
+import copy
+import datetime
+import json
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+
+import days
+
+HISTORY_FILE = '.benchmarks.json'
+
+
+def percentile(ordered, percent):
+    """Nearest rank percentile of a sorted list"""
+    return ordered[max(math.ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+def measure(func, data, repeat=5, warmup=1):
+    """Timings and peak memory of func on copies of data"""
+    for _ in range(warmup):
+        func(copy.deepcopy(data))
+    times = []
+    for _ in range(repeat):
+        arg = copy.deepcopy(data)
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    arg = copy.deepcopy(data)
+    tracemalloc.start()
+    try:
+        func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'min': times[0],
+        'median': statistics.median(times),
+        'p95': percentile(times, 95),
+        'peak': peak,
+        'repeat': repeat,
+    }
+
+
+def load_history(path):
+    try:
+        with open(path) as file_handle:
+            return json.load(file_handle)
+    except FileNotFoundError:
+        return []
+
+
+def baseline(history):
+    """Most recent result for each part in the history"""
+    latest = {}
+    for entry in history:
+        latest.update(entry['results'])
+    return latest
+
+
+def regressions(results, previous, threshold):
+    """Parts whose best time got more than threshold slower"""
+    return {
+        key: (previous[key]['min'], result['min'])
+        for key, result in results.items()
+        if key in previous
+        and result['min'] > previous[key]['min'] * (1 + threshold)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('days', nargs='*', type=int,
+                        default=sorted(days.PARSERS))
+    parser.add_argument('-n', '--repeat', type=int, default=5)
+    parser.add_argument('-w', '--warmup', type=int, default=1)
+    parser.add_argument('-t', '--threshold', type=float, default=0.1,
+                        help="fraction slower than the baseline to flag")
+    parser.add_argument('--history', default=HISTORY_FILE)
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    previous = baseline(history)
+    results = {}
+    print(f"{'part':<8}{'min ms':>12}{'median ms':>12}{'p95 ms':>12}"
+          f"{'peak KiB':>12}")
+    for day in args.days:
+        try:
+            data = days.load(day)
+        except (FileNotFoundError, RuntimeError) as error:
+            print(f"Skipping day {day}, no input: {error}", file=sys.stderr)
+            continue
+        for part, func in days.parts(day):
+            key = f"{day}.{part}"
+            try:
+                result = measure(func, data, args.repeat, args.warmup)
+            except Exception as error:
+                print(f"{key} failed: {error!r}", file=sys.stderr)
+                continue
+            results[key] = result
+            print(f"{key:<8}" + "".join(
+                f"{result[stat] * 1000:>12.3f}"
+                for stat in ('min', 'median', 'p95')
+            ) + f"{result['peak'] / 1024:>12.1f}")
+
+    history.append({
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'results': results,
+    })
+    with open(args.history, 'w') as file_handle:
+        json.dump(history, file_handle, indent=1)
+
+    slower = regressions(results, previous, args.threshold)
+    for key, (before, after) in sorted(slower.items()):
+        print(f"Regression in {key}: {before * 1000:.3f}ms -> "
+              f"{after * 1000:.3f}ms ({after / before - 1:+.0%})")
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Fails when a day module takes longer than a budget to import from cold
+
+    python check_imports.py [-b MS] [-n REPEAT] [DAY ...]
+
+Each module is imported in a fresh interpreter with -X importtime, and
+its cumulative time, everything it imports beyond what the interpreter
+loads at startup included, is compared with the budget. The best of
+REPEAT runs counts, to keep noise out.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_time(name):
+    """Milliseconds a fresh interpreter takes to import a module"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {name}'],
+        cwd=SOURCE_DIR, capture_output=True, text=True, check=True)
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        # Top level imports are the ones without indentation
+        if len(fields) == 3 and fields[2].rstrip() == f" {name}":
+            return int(fields[1]) / 1000
+    raise ValueError(f"No import time reported for {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('days', nargs='*', type=int, default=range(1, 26))
+    parser.add_argument('-b', '--budget', type=float, default=80,
+                        help="milliseconds allowed per module")
+    parser.add_argument('-n', '--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    over = []
+    for day in args.days:
+        name = f"day{day:02}"
+        best = min(import_time(name) for _ in range(args.repeat))
+        flag = ''
+        if best > args.budget:
+            over.append(name)
+            flag = '  over budget'
+        print(f"{name}  {best:8.1f}ms{flag}")
+    if over:
+        print(f"{', '.join(over)} over the {args.budget:g}ms budget")
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,36 +1,67 @@
-from inspect import signature
+import array
+import collections
+import enum
+import functools
 import logging
-import sys
 import math
+import operator
+import time
 
-logging.basicConfig(stream=sys.stderr, level=logging.INFO)
+LOG = logging.getLogger(__name__)
 
 
-class Point:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
+class Point(tuple):
+    """A 2D point, stored as the tuple (x, y)
+
+    Hashing and equality are the tuple's own, done in C, and a Point finds
+    the same set and dict entries as the plain tuple. For grids keyed by
+    int, packed() folds a point into a single int that neighbours can be
+    reached from by adding Point.packed_offsets.
+    """
+    __slots__ = ()
+
+    def __new__(cls, x, y):
+        return tuple.__new__(cls, (x, y))
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    x = property(operator.itemgetter(0))
+    y = property(operator.itemgetter(1))
 
     def __add__(self, other):
-        if not isinstance(other, type(self)):
+        if not isinstance(other, Point):
             return NotImplemented
-        return Point(self.x + other.x, self.y + other.y)
+        return tuple.__new__(Point, (self[0] + other[0], self[1] + other[1]))
 
     def __sub__(self, other):
-        if not isinstance(other, type(self)):
+        if not isinstance(other, Point):
             return NotImplemented
-        return Point(self.x - other.x, self.y - other.y)
+        return tuple.__new__(Point, (self[0] - other[0], self[1] - other[1]))
+
+    # Not a tuple when it comes to repeating
+    __mul__ = __rmul__ = None
 
     def __repr__(self):
-        return f"Point({self.x}, {self.y})"
+        return f"Point({self[0]}, {self[1]})"
+
+    def neighbours(self):
+        """The four points next to this one, in the order of directions"""
+        x, y = self
+        new = tuple.__new__
+        return (
+            new(Point, (x, y + 1)), new(Point, (x, y - 1)),
+            new(Point, (x + 1, y)), new(Point, (x - 1, y)),
+        )
 
-    def __hash__(self):
-        return hash((self.x, self.y))
+    def packed(self):
+        """The point as one int, for coordinates within 32 bits"""
+        return ((self[1] + _PACK_BIAS) << _PACK_BITS) | (self[0] + _PACK_BIAS)
 
-    def __eq__(self, other):
-        if not isinstance(other, type(self)):
-            return NotImplemented
-        return self.x == other.x and self.y == other.y
+    @classmethod
+    def unpack(cls, packed):
+        return cls((packed & _PACK_MASK) - _PACK_BIAS,
+                   (packed >> _PACK_BITS) - _PACK_BIAS)
 
     def angle(self, first, second):
         """Self if is the pivot"""
@@ -55,74 +86,763 @@ class Point:
         return Point(-self.y, self.x)
 
 
+_PACK_BITS = 32
+_PACK_MASK = (1 << _PACK_BITS) - 1
+_PACK_BIAS = 1 << (_PACK_BITS - 1)
+
 Point.directions = (Point(0, 1), Point(0, -1), Point(1, 0), Point(-1, 0))
+Point.packed_offsets = tuple(
+    (d.y << _PACK_BITS) + d.x for d in Point.directions
+)
+
+
+class Grid:
+    """Rectangular grid of one byte characters, stored row by row
+
+    Cells are numbered y * width + x. Indexing with an int reads that cell
+    and with a point reads (x, y), both giving a one character str.
+    neighbours[i] lists the cells next to cell i, in the order of
+    Point.directions and leaving out those off the edge, so searches can
+    run on ints without building points or checking bounds.
+    """
+    __slots__ = ('width', 'height', 'cells', '_neighbours')
+
+    def __init__(self, width, height, fill='.'):
+        self.width = width
+        self.height = height
+        self.cells = bytearray(fill.encode('latin-1') * (width * height))
+        self._neighbours = None
+
+    @classmethod
+    def parse(cls, text, fill=' '):
+        """Grid of the lines of text, short lines padded with fill"""
+        return cls.from_rows(text.strip('\n').split('\n'), fill)
+
+    @classmethod
+    def from_rows(cls, rows, fill=' '):
+        """Grid of rows given as strs or lists of characters"""
+        rows = [''.join(row) for row in rows]
+        width = max(map(len, rows), default=0)
+        grid = cls(width, len(rows), fill)
+        grid.cells[:] = ''.join(
+            row.ljust(width, fill) for row in rows).encode('latin-1')
+        return grid
+
+    def copy(self):
+        clone = Grid(self.width, self.height)
+        clone.cells[:] = self.cells
+        clone._neighbours = self._neighbours
+        return clone
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def point(self, index):
+        y, x = divmod(index, self.width)
+        return Point(x, y)
+
+    def _index(self, key):
+        if isinstance(key, int):
+            if not 0 <= key < len(self.cells):
+                raise IndexError(f"Cell {key} is outside the grid")
+            return key
+        x, y = key
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError(f"{key} is outside the grid")
+        return y * self.width + x
+
+    def __getitem__(self, key):
+        return chr(self.cells[self._index(key)])
+
+    def __setitem__(self, key, char):
+        self.cells[self._index(key)] = ord(char)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except IndexError:
+            return default
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __str__(self):
+        return '\n'.join(
+            bytes(self.row(y)).decode('latin-1') for y in range(self.height))
+
+    def row(self, y):
+        """Cells of a row, as a view on the grid"""
+        return memoryview(self.cells)[y * self.width:(y + 1) * self.width]
+
+    def column(self, x):
+        """Cells of a column, as a view on the grid"""
+        return memoryview(self.cells)[x::self.width]
+
+    def find(self, char, start=0):
+        """Index of the first cell holding char from start, or -1"""
+        return self.cells.find(ord(char), start)
+
+    def find_all(self, chars):
+        """Indices of every cell holding any of chars, in order"""
+        found = []
+        for char in set(chars):
+            code = ord(char)
+            index = self.cells.find(code)
+            while index != -1:
+                found.append(index)
+                index = self.cells.find(code, index + 1)
+        return sorted(found)
+
+    @property
+    def neighbours(self):
+        if self._neighbours is None:
+            width, height = self.width, self.height
+            self._neighbours = [
+                tuple(
+                    (y + dy) * width + x + dx
+                    for dx, dy in Point.directions
+                    if 0 <= x + dx < width and 0 <= y + dy < height
+                )
+                for y in range(height) for x in range(width)
+            ]
+        return self._neighbours
 
 
 class Done(Exception):
     pass
 
 
+class Status(enum.Enum):
+    """Why IntcodeComputer.run returned"""
+    HALTED = 'halted'
+    OUTPUT = 'output'
+    NEEDS_INPUT = 'needs input'
+    RUNNING = 'running'
+
+
+class Tracer:
+    """Hooks called by an IntcodeComputer with a tracer attached"""
+
+    def instruction(self, computer, pointer, func, args):
+        pass
+
+    def write(self, computer, address, value):
+        pass
+
+    def run(self, computer, status, elapsed):
+        pass
+
+
+class LoggingTracer(Tracer):
+    def __init__(self, log=LOG, level=logging.DEBUG):
+        self.log = log
+        self.level = level
+
+    def instruction(self, computer, pointer, func, args):
+        self.log.log(
+            self.level, "Calling %d -> %s(%s)", pointer, func.name,
+            ', '.join(str(a) if isinstance(a, int) else 'self' for a in args)
+        )
+
+    def write(self, computer, address, value):
+        self.log.log(self.level, "self.code[%d] = %d", address, value)
+
+
+class ProfilingTracer(Tracer):
+    """Counts where a computer spends its time
+
+    Instructions are counted per opcode and per address, memory reads and
+    writes per region of region_size cells, and every call that runs the
+    computer is timed. One tracer can be shared by several computers
+    running the same program.
+    """
+
+    def __init__(self, region_size=256):
+        self.region_size = region_size
+        self.opcodes = collections.Counter()
+        self.addresses = collections.Counter()
+        self.reads = collections.Counter()
+        self.writes = collections.Counter()
+        # (status, seconds) per run
+        self.runs = []
+        # Last instruction seen at each address, for the report
+        self.instructions = {}
+
+    def instruction(self, computer, pointer, func, args):
+        self.opcodes[func.name] += 1
+        self.addresses[pointer] += 1
+        entry = self.instructions[pointer] = computer.decode(pointer)
+        for mode, address in entry[1]:
+            if mode != 1:
+                if mode == 2:
+                    address += computer.relative_base
+                self.reads[address // self.region_size] += 1
+
+    def write(self, computer, address, value):
+        self.writes[address // self.region_size] += 1
+
+    def run(self, computer, status, elapsed):
+        self.runs.append((status, elapsed))
+
+    def report(self, top=10):
+        """Summary of the counts, with the hottest addresses disassembled"""
+        total = sum(self.opcodes.values())
+        seconds = sum(elapsed for _, elapsed in self.runs)
+        lines = [
+            f"{total} instructions in {len(self.runs)} runs, "
+            f"{seconds:.3f}s",
+            "Opcodes:",
+        ]
+        for name, count in self.opcodes.most_common():
+            lines.append(f"  {name:<22}{count:>12}{count / total:>8.1%}")
+        lines.append("Hot addresses:")
+        for pointer, count in self.addresses.most_common(top):
+            lines.append(
+                f"  {pointer:>6}{count:>12}  "
+                f"{format_instruction(*self.instructions[pointer])}")
+        lines.append("Memory regions:")
+        lines.append(f"  {'cells':<16}{'reads':>12}{'writes':>12}")
+        size = self.region_size
+        for region in sorted(self.reads.keys() | self.writes.keys()):
+            cells = f"{region * size}-{(region + 1) * size - 1}"
+            lines.append(
+                f"  {cells:<16}{self.reads[region]:>12}"
+                f"{self.writes[region]:>12}")
+        return "\n".join(lines)
+
+
+def format_instruction(func, params, target=None):
+    """Assembly style text for a decoded instruction"""
+    operands = [
+        f"[{value}]" if mode == 0 else
+        f"[rb{value:+d}]" if mode == 2 else
+        str(value)
+        for mode, value in params + ((target,) if target else ())
+    ]
+    return " ".join([func.name] + [", ".join(operands)]).rstrip()
+
+
+class SparseMemory(collections.defaultdict):
+    """Intcode memory as a dict of address to value"""
+
+    def __init__(self, code):
+        super().__init__(int, enumerate(code))
+
+    def fork(self):
+        clone = SparseMemory(())
+        clone.update(self)
+        return clone
+
+
+class ListMemory(list):
+    """Intcode memory as a list of Python ints, zero filled as it grows
+
+    Reading past the end raises IndexError, the computer treats that as 0
+    and calls grow before writing there.
+    """
+
+    def grow(self, address):
+        self.extend([0] * (max(address + 1, 2 * len(self)) - len(self)))
+
+    def fork(self):
+        return ListMemory(self)
+
+
+class ArrayMemory(array.array):
+    """Intcode memory as a flat array of 64 bit ints, zero filled as it grows
+
+    Storing a value that doesn't fit raises OverflowError, the computer
+    then moves its memory to a ListMemory.
+    """
+
+    def __new__(cls, code):
+        try:
+            return super().__new__(cls, 'q', code)
+        except OverflowError:
+            return ListMemory(code)
+
+    def grow(self, address):
+        size = max(address + 1, 2 * len(self)) - len(self)
+        self.frombytes(bytes(size * self.itemsize))
+
+    def fork(self):
+        clone = ArrayMemory(())
+        clone.frombytes(self.tobytes())
+        return clone
+
+
+class PagedMemory:
+    """Intcode memory split into fixed size pages
+
+    Forks share pages until one of them writes to a page, which then
+    gets its own copy, so forking costs the size of the page table and
+    not the size of the program.
+    """
+    __slots__ = ('pages', 'owned')
+    page_bits = 8
+    page_size = 1 << page_bits
+
+    def __init__(self, code):
+        code = list(code)
+        self.pages = [
+            code[start:start+self.page_size]
+            for start in range(0, len(code), self.page_size)
+        ]
+        if self.pages:
+            self.pages[-1].extend([0] * (self.page_size - len(self.pages[-1])))
+        self.owned = [True] * len(self.pages)
+
+    def __len__(self):
+        return len(self.pages) << self.page_bits
+
+    def __getitem__(self, address):
+        return self.pages[address >> self.page_bits][address % self.page_size]
+
+    def __setitem__(self, address, value):
+        page = address >> self.page_bits
+        if not self.owned[page]:
+            self.pages[page] = self.pages[page].copy()
+            self.owned[page] = True
+        self.pages[page][address % self.page_size] = value
+
+    def grow(self, address):
+        while len(self.pages) <= address >> self.page_bits:
+            self.pages.append([0] * self.page_size)
+            self.owned.append(True)
+
+    def fork(self):
+        clone = PagedMemory(())
+        clone.pages = self.pages.copy()
+        self.owned = [False] * len(self.pages)
+        clone.owned = self.owned.copy()
+        return clone
+
+
 # Needs to exist before the actual computer class for decorators
 class IntcodeComputerMeta(type):
-    op_codes = {}
+    """Collects the opcodes defined in a class body into its op_codes table
 
-    @classmethod
-    def opcode(cls, n):
+    Opcode functions are removed from the class namespace so they can
+    share names with the computer's attributes (input, output).
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        op_codes = {}
+        for base in reversed(bases):
+            op_codes.update(getattr(base, 'op_codes', {}))
+        for key, value in list(namespace.items()):
+            if hasattr(value, 'opcode'):
+                op_codes[value.opcode] = namespace.pop(key)
+        namespace['op_codes'] = op_codes
+        return super().__new__(mcs, name, bases, namespace)
+
+    @staticmethod
+    def opcode(n, writes=False, jumps=False, source=None):
+        """Mark a function as the handler for opcode n
+
+        Handlers that write return the value to store in their last
+        parameter, handlers that jump return the new pointer or None.
+        source is the handler as a Python template over its arguments
+        ({0}, {1}) for compiled execution: the value written, the jump
+        condition or a statement on the relative base rb.
+        """
         def wrapper(func):
-            assert n not in cls.op_codes
-            cls.op_codes[n] = func
-            params = signature(func).parameters
+            # From the code object rather than inspect.signature, which
+            # is slow to import
+            code = func.__code__
+            params = code.co_varnames[:code.co_argcount]
             func.n_args = len(params)
             func.needs_self = 'self' in params
             if func.needs_self:
                 func.n_args -= 1
+            func.writes = writes
+            func.jumps = jumps
+            func.source = source
             func.name = func.__name__
-
-            def wrapped(*args):
-                return func(*args)
-            return wrapped
+            func.opcode = n
+            return func
         return wrapper
 
 
 class IntcodeComputer(metaclass=IntcodeComputerMeta):
-    def __init__(self, code):
-        self.code = code
+    """Intcode virtual machine with position, immediate and relative modes
+
+    Day specific behaviour is supplied through callbacks: input_callback is
+    called for a value when the input queue is empty and output_callback,
+    if given, receives each output instead of it being queued in output.
+    memory is the class used to store the program, one of ListMemory,
+    ArrayMemory, PagedMemory or SparseMemory.
+    """
+    __slots__ = (
+        'code', 'pointer', 'relative_base', 'input', 'output', 'done',
+        'tracer', 'input_callback', 'output_callback',
+        '_decoded', '_decoded_cells', '_decoded_owned',
+    )
+    # The decode cache is split into pages of this many cells, which
+    # forks share until one of them changes a page
+    decode_page_bits = 8
+
+    def __init__(self, code, tracer=None,
+                 input_callback=None, output_callback=None,
+                 memory=ListMemory):
+        self.code = memory(code)
+        self.tracer = tracer
+        self.input_callback = input_callback
+        self.output_callback = output_callback
         self.pointer = 0
-        self.input = []
+        self.relative_base = 0
+        self.input = collections.deque()
         self.output = []
         self.done = False
+        # Pages of pointer -> (func, params, target)
+        self._decoded = []
+        # Pages of cell -> set of pointers of decoded instructions that
+        # read that cell
+        self._decoded_cells = []
+        self._decoded_owned = []
 
-    @property
-    def func(self):
-        return type(self).op_codes[self.code[self.pointer] % 100]
+    @IntcodeComputerMeta.opcode(1, writes=True, source='{0} + {1}')
+    def add(a, b):
+        return a + b
 
-    @property
-    def args(self):
-        args = []
-        if self.func.needs_self:
-            args.append(self)
-        for n in range(self.func.n_args):
-            mode = (self.code[self.pointer] // 10**(n+2)) % 10
-            arg = self.code[self.pointer+1+n]
-            if mode == 0:
-                assert arg >= 0
-                arg = self.code[arg]
-            args.append(arg)
-        return args
+    @IntcodeComputerMeta.opcode(2, writes=True, source='{0} * {1}')
+    def mult(a, b):
+        return a * b
+
+    @IntcodeComputerMeta.opcode(3, writes=True)
+    def input(self):
+        if self.input:
+            return self.input.popleft()
+        return self.input_callback()
+
+    @IntcodeComputerMeta.opcode(4)
+    def output(self, a):
+        if self.output_callback is None:
+            self.output.append(a)
+        else:
+            self.output_callback(a)
+
+    @IntcodeComputerMeta.opcode(5, jumps=True, source='{0} != 0')
+    def jump_if_true(a, b):
+        if a != 0:
+            return b
+
+    @IntcodeComputerMeta.opcode(6, jumps=True, source='{0} == 0')
+    def jump_if_false(a, b):
+        if a == 0:
+            return b
+
+    @IntcodeComputerMeta.opcode(7, writes=True, source='int({0} < {1})')
+    def less_than(a, b):
+        return int(a < b)
+
+    @IntcodeComputerMeta.opcode(8, writes=True, source='int({0} == {1})')
+    def equals(a, b):
+        return int(a == b)
+
+    @IntcodeComputerMeta.opcode(9, source='rb += {0}')
+    def relative_base_offset(self, a):
+        self.relative_base += a
+
+    @IntcodeComputerMeta.opcode(99)
+    def done():
+        raise Done
+
+    def decode(self, pointer):
+        """Decode the instruction at pointer, cached until one of its cells
+        is written to"""
+        bits = self.decode_page_bits
+        try:
+            return self._decoded[pointer >> bits][pointer]
+        except (IndexError, KeyError):
+            pass
+        instruction = self.read(pointer)
+        func = self.op_codes[instruction % 100]
+        params = []
+        modes = instruction // 100
+        for n in range(func.n_args):
+            params.append((modes % 10, self.read(pointer+1+n)))
+            modes //= 10
+        size = 1 + func.n_args
+        target = None
+        if func.writes:
+            target = (modes % 10, self.read(pointer+size))
+            size += 1
+        entry = (func, tuple(params), target)
+        self._own_decoded(pointer, size)
+        self._decoded[pointer >> bits][pointer] = entry
+        cells = self._decoded_cells
+        for cell in range(pointer, pointer+size):
+            cells[cell >> bits].setdefault(cell, set()).add(pointer)
+        return entry
+
+    def _own_decoded(self, address, size=1):
+        """Make the decode cache pages covering size cells from address
+        this computer's own, copying any shared with a fork, so they can
+        be changed"""
+        bits = self.decode_page_bits
+        decoded = self._decoded
+        owned = self._decoded_owned
+        last = (address + size - 1) >> bits
+        while len(decoded) <= last:
+            decoded.append({})
+            self._decoded_cells.append({})
+            owned.append(True)
+        for page in range(address >> bits, last + 1):
+            if not owned[page]:
+                decoded[page] = decoded[page].copy()
+                self._decoded_cells[page] = {
+                    cell: pointers.copy()
+                    for cell, pointers in self._decoded_cells[page].items()
+                }
+                owned[page] = True
+
+    def _is_decoded(self, address):
+        """Whether an instruction has been decoded from the cell"""
+        page = address >> self.decode_page_bits
+        cells = self._decoded_cells
+        return page < len(cells) and address in cells[page]
+
+    def read(self, address):
+        assert address >= 0
+        try:
+            return self.code[address]
+        except IndexError:
+            return 0
+
+    def write(self, address, value):
+        """Write to memory, dropping any decoded instruction it overlaps"""
+        assert address >= 0
+        self._store(address, value)
+        if self._is_decoded(address):
+            self._invalidate(address)
+
+    def _invalidate(self, address):
+        """Forget everything decoded from the cell at address"""
+        bits = self.decode_page_bits
+        cells = self._decoded_cells
+        self._own_decoded(address)
+        for pointer in cells[address >> bits].pop(address):
+            entry = self._decoded[pointer >> bits][pointer]
+            func, params, target = entry
+            size = 1 + len(params) + (target is not None)
+            self._own_decoded(pointer, size)
+            del self._decoded[pointer >> bits][pointer]
+            # The instruction's other cells no longer lead to it
+            for cell in range(pointer, pointer+size):
+                if cell == address:
+                    continue
+                pointers = cells[cell >> bits][cell]
+                pointers.discard(pointer)
+                if not pointers:
+                    del cells[cell >> bits][cell]
+
+    def _store(self, address, value):
+        """Slow path for writes that need memory to grow or be widened"""
+        try:
+            self.code[address] = value
+        except IndexError:
+            self.code.grow(address)
+            self._store(address, value)
+        except OverflowError:
+            self.code = ListMemory(self.code)
+            self.code[address] = value
+
+    def fork(self):
+        """Copy of this computer that runs independently of it
+
+        Memory is forked rather than copied, which for PagedMemory shares
+        pages until they're written, and the decode cache is shared by
+        page in the same way. Callbacks and the tracer are shared.
+        """
+        clone = object.__new__(type(self))
+        for slot in IntcodeComputer.__slots__:
+            setattr(clone, slot, getattr(self, slot))
+        clone.code = self.code.fork()
+        clone.input = self.input.copy()
+        clone.output = self.output.copy()
+        clone._decoded = self._decoded.copy()
+        clone._decoded_cells = self._decoded_cells.copy()
+        self._decoded_owned = [False] * len(self._decoded)
+        clone._decoded_owned = self._decoded_owned.copy()
+        return clone
 
     def step(self):
-        logging.debug(
-            f"Calling {self.pointer} -> {self.func.name}(" +
-            ', '.join(
-                str(a) if isinstance(a, int) else 'self' for a in self.args
-            ) +
-            ")"
-        )
-        func = self.func
-        result = func(*self.args)
-        self.pointer += 1 + func.n_args
-        if result is not None:
-            assert isinstance(result, int)
-            logging.debug(f"self.code[{self.code[self.pointer]}] = {result}")
-            self.code[self.code[self.pointer]] = result
-            self.pointer += 1
+        if self._run(steps=1) is Status.HALTED:
+            raise Done
+
+    def run(self, steps=None):
+        """Run until the program halts, or for at most steps instructions"""
+        return self._run(steps=steps)
+
+    def run_until_output(self, n=1, until_input=False):
+        """Run until n more values have been output, or with until_input
+        until an input instruction is reached with no input queued"""
+        return self._run(outputs=n, until_input=until_input)
+
+    def run_until_input_needed(self):
+        """Run until an input instruction is reached with no input queued"""
+        return self._run(until_input=True)
+
+    def coroutine(self):
+        """Run as a generator that yields each output as it's produced
+
+        Status.NEEDS_INPUT is yielded when the program is waiting for
+        input, which is given with send(). A value sent after an output
+        is queued as input too. Outputs have to be queued for this, so
+        it can't be used with an output_callback.
+        """
+        if self.output_callback is not None:
+            raise ValueError("coroutine() can't be used with output_callback")
+        return self._coroutine()
+
+    def _coroutine(self):
+        while True:
+            status = self._run(outputs=1, until_input=True)
+            if status is Status.HALTED:
+                return
+            if status is Status.OUTPUT:
+                value = yield self.output.pop()
+            else:
+                value = yield Status.NEEDS_INPUT
+            if value is not None:
+                self.input.append(value)
+
+    def _run(self, steps=None, outputs=None, until_input=False):
+        code = self.code
+        decoded = self._decoded
+        decoded_cells = self._decoded_cells
+        bits = self.decode_page_bits
+        decode = self.decode
+        tracer = self.tracer
+        if tracer is not None:
+            start = time.perf_counter()
+        pointer = self.pointer
+        remaining = -1 if steps is None else steps
+        status = Status.RUNNING
+        try:
+            while remaining:
+                remaining -= 1
+                try:
+                    entry = decoded[pointer >> bits][pointer]
+                except (IndexError, KeyError):
+                    entry = decode(pointer)
+                func, params, target = entry
+                opcode = func.opcode
+                if opcode == 3 and not self.input and (
+                        until_input or self.input_callback is None):
+                    status = Status.NEEDS_INPUT
+                    break
+                args = [self] if func.needs_self else []
+                for mode, arg in params:
+                    if mode != 1:
+                        if mode == 2:
+                            arg += self.relative_base
+                        assert arg >= 0
+                        try:
+                            arg = code[arg]
+                        except IndexError:
+                            arg = 0
+                    args.append(arg)
+                if tracer is not None:
+                    tracer.instruction(self, pointer, func, args)
+                result = func(*args)
+                if target is not None:
+                    mode, address = target
+                    if mode == 2:
+                        address += self.relative_base
+                    if tracer is not None:
+                        tracer.write(self, address, result)
+                    assert address >= 0
+                    try:
+                        code[address] = result
+                    except (IndexError, OverflowError):
+                        self._store(address, result)
+                        code = self.code
+                    page = address >> bits
+                    if page < len(decoded_cells) and \
+                            address in decoded_cells[page]:
+                        self._invalidate(address)
+                    pointer += len(params) + 2
+                elif result is not None:
+                    pointer = result
+                else:
+                    pointer += len(params) + 1
+                if opcode == 4 and outputs is not None:
+                    outputs -= 1
+                    if outputs == 0:
+                        status = Status.OUTPUT
+                        break
+        except Done:
+            self.done = True
+            status = Status.HALTED
+        self.pointer = pointer
+        if tracer is not None:
+            tracer.run(self, status, time.perf_counter() - start)
+        return status
+
+
+def program_hash(code):
+    """Stable digest of a program image"""
+    import hashlib
+    return hashlib.sha1(','.join(map(str, code)).encode()).hexdigest()
+
+
+class RunCache:
+    """Memoizes a function of a program and its inputs
+
+    For functions func(code, *inputs) that run code from scratch, so the
+    result depends only on the program image and the inputs. Results are
+    kept in an LRU of maxsize entries and, once open() has been called,
+    in a shelve file that lasts between sessions. open() returns the
+    cache, which closes the file when used as a context manager.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.results = collections.OrderedDict()
+        self.store = None
+        self.hits = 0
+        self.misses = 0
+
+    def open(self, path):
+        import shelve
+        self.close()
+        self.store = shelve.open(path)
+        return self
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapped(code, *inputs):
+            key = f"{func.__qualname__}:{program_hash(code)}:{inputs!r}"
+            try:
+                self.results.move_to_end(key)
+                self.hits += 1
+                return self.results[key]
+            except KeyError:
+                pass
+            if self.store is not None and key in self.store:
+                self.hits += 1
+                result = self.store[key]
+            else:
+                self.misses += 1
+                result = func(code, *inputs)
+                if self.store is not None:
+                    self.store[key] = result
+            self.results[key] = result
+            if len(self.results) > self.maxsize:
+                self.results.popitem(last=False)
+            return result
+        wrapped.cache = self
+        return wrapped
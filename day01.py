@@ -1,6 +1,6 @@
 """Solution do day 1 of Advent of Code"""
 
-from get_input import get_input, line_parser
+from get_input import get_input, int_parser
 
 def part1(lines):
     total = 0
@@ -24,7 +24,7 @@ def part2(lines):
     return total
 
 if __name__ == "__main__":
-    LINES = line_parser(get_input(day=1, year=2019)) 
+    LINES = int_parser(get_input(day=1, year=2019)) 
     print(f"Part 1: {part1(LINES)}")
     assert get_fuel(14) == 2
     assert get_fuel(1969) == 966
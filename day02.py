@@ -3,13 +3,122 @@
 from itertools import product
 import inspect
 
-from get_input import get_input, line_parser
+from get_input import get_program
 
 
 class Done(Exception):
     pass
 
 
+class Unsolvable(Exception):
+    pass
+
+
+class Unknown:
+    """Value read from an address that depends on a variable"""
+
+    def __add__(self, other):
+        return self
+
+    __radd__ = __mul__ = __rmul__ = __add__
+
+    def __repr__(self):
+        return "UNKNOWN"
+
+
+UNKNOWN = Unknown()
+
+
+class Polynomial:
+    """Polynomial with integer coefficients over named variables
+
+    Terms map a monomial, a sorted tuple of (name, power) pairs, to its
+    coefficient. Arithmetic that leaves only a constant returns an int, so
+    concrete values stay plain ints.
+    """
+
+    def __init__(self, terms):
+        self.terms = {
+            monomial: coeff for monomial, coeff in terms.items() if coeff
+        }
+
+    @classmethod
+    def variable(cls, name):
+        return cls({((name, 1),): 1})
+
+    @classmethod
+    def _new(cls, terms):
+        this = cls(terms)
+        if not this.terms:
+            return 0
+        if list(this.terms) == [()]:
+            return this.terms[()]
+        return this
+
+    @staticmethod
+    def _terms(other):
+        if isinstance(other, Polynomial):
+            return other.terms
+        return {(): other}
+
+    def __add__(self, other):
+        if other is UNKNOWN:
+            return UNKNOWN
+        terms = dict(self.terms)
+        for monomial, coeff in self._terms(other).items():
+            terms[monomial] = terms.get(monomial, 0) + coeff
+        return self._new(terms)
+
+    def __mul__(self, other):
+        if other is UNKNOWN:
+            return UNKNOWN
+        terms = {}
+        for (left, a), (right, b) in product(
+                self.terms.items(), self._terms(other).items()):
+            powers = dict(left)
+            for name, power in right:
+                powers[name] = powers.get(name, 0) + power
+            monomial = tuple(sorted(powers.items()))
+            terms[monomial] = terms.get(monomial, 0) + a * b
+        return self._new(terms)
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def substitute(self, **values):
+        """Polynomial (or int) with the given variables replaced"""
+        result = 0
+        for monomial, coeff in self.terms.items():
+            remaining = []
+            for name, power in monomial:
+                if name in values:
+                    coeff *= values[name] ** power
+                else:
+                    remaining.append((name, power))
+            result = result + self._new({tuple(remaining): coeff})
+        return result
+
+    def coefficients(self, name):
+        """Coefficients of each power of name, lowest first"""
+        degree = max(dict(monomial).get(name, 0) for monomial in self.terms)
+        coeffs = [0] * (degree + 1)
+        for monomial, coeff in self.terms.items():
+            powers = dict(monomial)
+            power = powers.pop(name, 0)
+            coeffs[power] = coeffs[power] + self._new(
+                {tuple(sorted(powers.items())): coeff})
+        return coeffs
+
+    def __repr__(self):
+        return " + ".join(
+            "*".join([str(coeff)] + [
+                name if power == 1 else f"{name}**{power}"
+                for name, power in monomial
+            ])
+            for monomial, coeff in sorted(self.terms.items())
+        )
+
+
 class Program:
     _opcodes = {}
 
@@ -68,6 +177,62 @@ def done():
     raise Done("Program complete")
 
 
+class SymbolicProgram(Program):
+    """Program whose memory may hold Polynomials as well as ints
+
+    Arithmetic carries the expressions along. Reading through an address
+    that depends on a variable gives UNKNOWN, which is fine as long as it
+    is overwritten before it matters. Jumping or writing through one isn't.
+    """
+
+    def step(self):
+        if not isinstance(self[self._pointer], int):
+            raise Unsolvable(f"Symbolic instruction at {self._pointer}")
+        super().step()
+
+    def __getitem__(self, item):
+        if not isinstance(item, int):
+            return UNKNOWN
+        return super().__getitem__(item)
+
+    def __setitem__(self, item, value):
+        if not isinstance(item, int):
+            raise Unsolvable(f"Write to symbolic address {item}")
+        super().__setitem__(item, value)
+
+
+def solve(lines, target=19690720, nouns=range(100), verbs=range(100)):
+    """Finds noun and verb from a single symbolic run of the program, one
+    equation in the verb per noun"""
+    program = lines[:]
+    program[1:3] = [Polynomial.variable('noun'), Polynomial.variable('verb')]
+    result = SymbolicProgram.run_until_complete(program)[0]
+    if result is UNKNOWN:
+        raise Unsolvable("Result depends on a symbolic address")
+    for n in nouns:
+        equation = result
+        if isinstance(equation, Polynomial):
+            equation = equation.substitute(noun=n)
+        if isinstance(equation, Polynomial):
+            coeffs = equation.coefficients('verb')
+        else:
+            coeffs = [equation]
+        coeffs[0] -= target
+        if len(coeffs) == 1:
+            candidates = verbs[:1] if coeffs[0] == 0 else []
+        elif len(coeffs) == 2:
+            v, remainder = divmod(-coeffs[0], coeffs[1])
+            candidates = [v] if remainder == 0 and v in verbs else []
+        else:
+            candidates = (
+                v for v in verbs
+                if sum(c * v**p for p, c in enumerate(coeffs)) == 0
+            )
+        for v in candidates:
+            return n * 100 + v
+    raise Exception("No solution found")
+
+
 def part1(start):
     program = start[:]
     program[1:3] = [12, 2]
@@ -75,6 +240,14 @@ def part1(start):
 
 
 def part2(lines):
+    try:
+        return solve(lines)
+    except Unsolvable:
+        pass
+    try:
+        return part2_lanes(lines)
+    except ImportError:
+        pass
     for n, v in product(range(100), range(100)):
         program = lines[:]
         program[1:3] = [n, v]
@@ -83,10 +256,25 @@ def part2(lines):
     raise Exception("No solution found")
 
 
+def part2_lanes(lines, target=19690720):
+    """Runs every noun and verb at once, one lane each"""
+    # Imported here as NumPy is slow to import and usually not needed
+    from lanes import IntcodeLanes
+    pairs = list(product(range(100), range(100)))
+    lanes = IntcodeLanes(lines, len(pairs))
+    lanes.memory[:, 1:3] = pairs
+    lanes.run()
+    results = lanes.memory[:, 0].tolist()
+    if target not in results:
+        raise Exception("No solution found")
+    n, v = pairs[results.index(target)]
+    return n * 100 + v
+
+
 if __name__ == "__main__":
     TEST = [1, 9, 10, 3, 2, 3, 11, 0, 99, 30, 40, 50]
     assert Program.run_until_complete(TEST)[0] == 3500
 
-    LINES = line_parser(get_input(day=2, year=2019), seperator=',')
+    LINES = get_program(day=2, year=2019)
     print(f"Part 1: {part1(LINES)}")
     print(f"Part 2: {part2(LINES)}")
@@ -3,6 +3,7 @@
 from collections import defaultdict
 
 from get_input import get_input, line_parser
+import search
 
 
 def part1(orbits):
@@ -22,18 +23,11 @@ def part2(orbits):
         orbit_map[b].add(a)
     goal = list(orbit_map['SAN'])[0]
     start = list(orbit_map['YOU'])[0]
-    queue = [(0, start)]
-    seen = set()
-    while queue:
-        steps, current = queue.pop(0)
-        if current == goal:
-            return steps
-        if current in seen:
-            continue
-        seen.add(current)
-        for step in orbit_map[current]:
-            queue.append((steps+1, step))
-    raise Exception("Cannot be done")
+    result = search.bfs(
+        [start], orbit_map.__getitem__, lambda orbit: orbit == goal)
+    if result.goal is None:
+        raise Exception("Cannot be done")
+    return result.distance
 
 
 def parse(line):
@@ -1,41 +1,37 @@
 """Solution to day 10 of Advent of Code"""
 
 import collections
-import sys
-import re
 import math
 
-from common import Point
-from get_input import get_input, line_parser
+from common import Grid, Point
+from get_input import get_input
+
+
+def asteroids(asteriod_map):
+    return [asteriod_map.point(i) for i in asteriod_map.find_all('#')]
 
 
 def closest(asteriod_map, location, check):
     if location == check:
         return location
-    diff = location - check
+    diff = check - location
     step_size = math.gcd(diff.x, diff.y)
-    step = Point(-diff.x / step_size, -diff.y / step_size)
-    # print(f"{location} + {check} = {diff}")
+    step = Point(diff.x // step_size, diff.y // step_size)
     position = location + step
     while position != check:
-        # print("\t" + f"Checking {position}")
         if asteriod_map[position] == '#':
             return position
-        assert float(position.x).is_integer() and\
-            float(position.y).is_integer()
         position += step
     return check
 
 
 def part1(asteriod_map):
     best_detected = None
-    for location, char in asteriod_map.items():
-        if char != '#':
-            continue
+    candidates = asteroids(asteriod_map)
+    for location in candidates:
         detected = 0
-        for check in asteriod_map.keys():
+        for check in candidates:
             if check != location and\
-                    asteriod_map[check] == '#' and\
                     closest(asteriod_map, location, check) == check:
                 detected += 1
         best_detected = best_detected or detected
@@ -46,9 +42,7 @@ def part1(asteriod_map):
 
 def order(firing_location, asteriod_map):
     order = collections.defaultdict(list)
-    for point, char in asteriod_map.items():
-        if char != '#':
-            continue
+    for point in asteroids(asteriod_map):
         angle = (360 - firing_location.angle(
             firing_location + Point(0, -1),
             point
@@ -68,13 +62,11 @@ def order(firing_location, asteriod_map):
 def part2(asteriod_map):
     best_detected = None
     best_location = None
-    for location, char in asteriod_map.items():
-        if char != '#':
-            continue
+    candidates = asteroids(asteriod_map)
+    for location in candidates:
         detected = 0
-        for check in asteriod_map.keys():
+        for check in candidates:
             if check != location and\
-                    asteriod_map[check] == '#' and\
                     closest(asteriod_map, location, check) == check:
                 detected += 1
         best_detected = best_detected or detected
@@ -88,11 +80,7 @@ def part2(asteriod_map):
 
 
 def parse(text):
-    asteroid_map = {}
-    for y, row in enumerate(text.split('\n')):
-        for x, char in enumerate(list(row)):
-            asteroid_map[Point(x, y)] = char
-    return asteroid_map
+    return Grid.parse(text)
 
 
 TEST1 = """.#..#
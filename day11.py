@@ -2,10 +2,8 @@
 
 import collections
 
-
-from common import Point
-from day09 import IntcodeComputerDay9, Done
-from get_input import get_input, line_parser
+from common import IntcodeComputer, Point
+from get_input import get_program
 
 
 class Painter:
@@ -17,16 +15,15 @@ class Painter:
 def part1(code):
     ship = collections.defaultdict(list)
     robot = Painter(position=Point(0, 0), heading=Point(0, 1))
-    computer = IntcodeComputerDay9(code.copy())
+    brain = IntcodeComputer(code.copy()).coroutine()
+    next(brain)
     while True:
         colors = ship[robot.position]
-        computer.input.append(colors[-1] if colors else 0)
         try:
-            while len(computer.output) < 2:
-                computer.step()
-        except Done:
+            color = brain.send(colors[-1] if colors else 0)
+            turn = next(brain)
+        except StopIteration:
             break
-        color, turn = computer.output.pop(0), computer.output.pop(0)
         ship[robot.position].append(color)
         if turn == 0:
             robot.heading = robot.heading.turn_left()
@@ -41,16 +38,15 @@ def part1(code):
 def part2(code):
     ship = collections.defaultdict(int)
     robot = Painter(position=Point(0, 0), heading=Point(0, 1))
-    computer = IntcodeComputerDay9(code.copy())
+    brain = IntcodeComputer(code.copy()).coroutine()
+    next(brain)
     ship[Point(0, 0)] = 1
     while True:
-        computer.input.append(ship[robot.position])
         try:
-            while len(computer.output) < 2:
-                computer.step()
-        except Done:
+            color = brain.send(ship[robot.position])
+            turn = next(brain)
+        except StopIteration:
             break
-        color, turn = computer.output.pop(0), computer.output.pop(0)
         ship[robot.position] = color
         if turn == 0:
             robot.heading = robot.heading.turn_left()
@@ -71,6 +67,6 @@ def part2(code):
 
 
 if __name__ == "__main__":
-    lines = line_parser(get_input(11, 2019), seperator=',')
+    lines = get_program(11, 2019)
     print(f"Part 1: {part1(lines)}")
     print(f"Part 2: {part2(lines)}")
@@ -2,7 +2,6 @@
 
 import re
 import itertools
-import collections
 import math
 
 from get_input import get_input, line_parser
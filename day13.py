@@ -1,124 +1,34 @@
 """Solution to day 13 of Advent of Code"""
 
-import re
-import itertools
-import collections
-import math
-import logging
 import sys
 
-from get_input import get_input, line_parser
-from common import Point, IntcodeComputerMeta, IntcodeComputer, Done
+from get_input import get_program
+from common import Point, IntcodeComputer, ProfilingTracer, Status
 
-logging.basicConfig(stream=sys.stderr, level=logging.DEBUG)
 
+class Game:
+    characters = {
+        0: ' ',
+        1: '|',
+        2: '-',
+        3: '_',
+        4: 'o',
+    }
 
-class IntcodeComputerDay13(IntcodeComputer):
-    def __init__(self, code, *args, **kwargs):
-        super().__init__(code, *args, **kwargs)
-        self.relative_base = 0
-        self.code = collections.defaultdict(int, enumerate(code))
+    def __init__(self):
         self.screen_x = 41
         self.screen_y = 25
         self.score = None
         self.clear_screen()
         self.ball = None
         self.paddle = None
-        self.characters = {
-            0: ' ',
-            1: '|',
-            2: '-',
-            3: '_',
-            4: 'o',
-        }
 
-    @property
-    def args(self):
-        args = []
-        if self.func.needs_self:
-            args.append(self)
-        for n in range(self.func.n_args):
-            mode = (self.code[self.pointer] // 10**(n+2)) % 10
-            arg = self.code[self.pointer+1+n]
-            if mode == 0:
-                assert arg >= 0
-                arg = self.code[arg]
-            elif mode == 2:
-                assert self.relative_base+arg >= 0
-                arg = self.code[self.relative_base+arg]
-            args.append(arg)
-        return args
-
-    def step(self):
-        logging.debug(
-            f"Calling {self.pointer} -> {self.func.name}(" +
-            ', '.join(
-                str(a) if isinstance(a, int) else 'self' for a in self.args
-            ) +
-            ")"
-        )
-        func = self.func
-        # import pdb; pdb.set_trace()
-        result = func(*self.args)
-        if result is not None:
-            assert isinstance(result, int)
-            pos = self.code[self.pointer+1+func.n_args]
-            if self.code[self.pointer] // 10**(2+self.func.n_args) == 2:
-                pos += self.relative_base
-            logging.debug(f"self.code[{pos}] = {result}")
-            assert pos >= 0
-            self.code[pos] = result
-            self.pointer += 1
-        self.pointer += 1 + func.n_args
-
-    @IntcodeComputerMeta.opcode(1)
-    def add(a, b):
-        return a + b
-
-    @IntcodeComputerMeta.opcode(2)
-    def mult(a, b):
-        return a * b
-
-    @IntcodeComputerMeta.opcode(3)
-    def input(self):
+    def joystick(self):
         if self.ball.x == self.paddle.x:
-            self.input.append(0)
+            return 0
         elif self.ball.x > self.paddle.x:
-            self.input.append(1)
-        elif self.ball.x < self.paddle.x:
-            self.input.append(-1)
-        return self.input.pop(0)
-
-    @IntcodeComputerMeta.opcode(4)
-    def output(self, a):
-        self.output.append(a)
-
-    @IntcodeComputerMeta.opcode(5)
-    def jump_if_true(self, a, b):
-        if a != 0:
-            self.pointer = b - 3
-
-    @IntcodeComputerMeta.opcode(6)
-    def jump_if_false(self, a, b):
-        if a == 0:
-            self.pointer = b - 3
-
-    @IntcodeComputerMeta.opcode(7)
-    def less_than(a, b):
-        return int(a < b)
-
-    @IntcodeComputerMeta.opcode(8)
-    def equals(a, b):
-        return int(a == b)
-
-    @IntcodeComputerMeta.opcode(9)
-    def relative_base_offset(self, a):
-        self.relative_base += a
-
-    @IntcodeComputerMeta.opcode(99)
-    def done(self):
-        self.done = True
-        raise Done
+            return 1
+        return -1
 
     def draw_screen(self):
         print('\n'.join(''.join(row) for row in self.screen))
@@ -131,13 +41,9 @@ class IntcodeComputerDay13(IntcodeComputer):
         ]
 
 
-def part1(code):
-    computer = IntcodeComputerDay13(code)
-    while True:
-        try:
-            computer.step()
-        except Done:
-            break
+def part1(code, tracer=None):
+    computer = IntcodeComputer(code, tracer=tracer)
+    computer.run()
     total = 0
     for i in range(2, len(computer.output), 3):
         if computer.output[i] == 2:
@@ -145,30 +51,30 @@ def part1(code):
     return total
 
 
-def part2(code):
+def part2(code, tracer=None):
     code = code.copy()
     code[0] = 2
-    computer = IntcodeComputerDay13(code)
-    while True:
-        if len(computer.output) == 3:
-            x, y, value = computer.output
-            computer.output.clear()
-            if value == 3:
-                computer.paddle = Point(x, y)
-            if value == 4:
-                computer.ball = Point(x, y)
-            if x == -1 and y == 0:
-                computer.score = value
-                continue
-            computer.screen[y][x] = computer.characters[value]
-        try:
-            computer.step()
-        except Done:
-            break
-    return computer.score
+    game = Game()
+    computer = IntcodeComputer(
+        code, tracer=tracer, input_callback=game.joystick)
+    while computer.run_until_output(3) is not Status.HALTED:
+        x, y, value = computer.output
+        computer.output.clear()
+        if value == 3:
+            game.paddle = Point(x, y)
+        if value == 4:
+            game.ball = Point(x, y)
+        if x == -1 and y == 0:
+            game.score = value
+            continue
+        game.screen[y][x] = game.characters[value]
+    return game.score
 
 
 if __name__ == '__main__':
-    lines = line_parser(get_input(13, 2019), seperator=',')
-    print(f"Part 1: {part1(lines)}")
-    print(f"Part 2: {part2(lines)}")
+    lines = get_program(13, 2019)
+    tracer = ProfilingTracer() if '--profile' in sys.argv else None
+    print(f"Part 1: {part1(lines, tracer)}")
+    print(f"Part 2: {part2(lines, tracer)}")
+    if tracer is not None:
+        print(tracer.report(), file=sys.stderr)
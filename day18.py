@@ -1,13 +1,11 @@
 """Solution to day 18 of Advent of Code"""
 
 import collections
-import copy
-import itertools
-import re
-import heapq
+import string
 
-from common import Point
+from common import Grid
 from get_input import get_input, line_parser
+import search
 
 
 class State(collections.namedtuple("State", 'position seen keys steps')):
@@ -18,125 +16,81 @@ class State(collections.namedtuple("State", 'position seen keys steps')):
         return self.steps == other.steps and len(self.keys) == len(other.keys)
 
 
+def parse_vault(inital):
+    """The map, the start and the doors and keys by cell"""
+    grid = Grid.from_rows(inital)
+    assert set(grid.cells) <= set(
+        (string.ascii_letters + '.#@').encode()), "Not a valid map character"
+    starts = grid.find_all('@')
+    assert len(starts) == 1, "Expected a single start location"
+    all_doors = {i: grid[i] for i in grid.find_all(string.ascii_uppercase)}
+    all_keys = {i: grid[i] for i in grid.find_all(string.ascii_lowercase)}
+    return grid, starts[0], all_doors, all_keys
+
+
+def reachable_keys(grid, start, keys, all_doors, all_keys):
+    """Keys not yet held that can be walked to from start, and how far"""
+    wall = ord('#')
+
+    def neighbours(pos):
+        if pos in all_keys and all_keys[pos] not in keys:
+            return ()
+        return [
+            neighbour for neighbour in grid.neighbours[pos]
+            if grid.cells[neighbour] != wall and not (
+                neighbour in all_doors and
+                all_doors[neighbour].lower() not in keys
+            )
+        ]
+
+    distances = search.bfs([start], neighbours).distances
+    return {
+        pos: steps for pos, steps in distances.items()
+        if pos in all_keys and all_keys[pos] not in keys
+    }
+
+
+def collect_keys(grid, starts, all_doors, all_keys):
+    """Fewest steps for robots at starts, one moving at a time, to pick up
+    every key"""
+    reachable = {}
+
+    def neighbours(state):
+        keys, bots = state
+        for b, pos in enumerate(bots):
+            if (pos, keys) not in reachable:
+                reachable[pos, keys] = reachable_keys(
+                    grid, pos, keys, all_doors, all_keys)
+            for key_pos, steps in reachable[pos, keys].items():
+                new_bots = bots[:b] + (key_pos,) + bots[b+1:]
+                yield (keys | {all_keys[key_pos]}, new_bots), steps
+
+    result = search.dijkstra(
+        [(frozenset(), starts)], neighbours,
+        lambda state: len(state[0]) == len(all_keys),
+    )
+    if result.goal is None:
+        raise Exception("Not every key can be reached")
+    return result.distance
+
+
 def part1(inital):
-    mapping = {}
-    all_doors = {}
-    all_keys = {}
-    start = None
-    for r, row in enumerate(inital):
-        for c, char in enumerate(row):
-            point = Point(c, r)
-            if char.upper() != char.lower() or char == '@':
-                if char == '@':
-                    assert start is None
-                    start = point
-                elif char.upper() == char:
-                    all_doors[point] = char
-                elif char.lower() == char:
-                    all_keys[point] = char
-                else:
-                    raise NotImplementedError
-                char = '.'
-            assert char in {'.', '#'}, "Not a valid map character"
-            mapping[point] = char
-    assert start is not None, "No start location found"
-    distances = {(frozenset(), start): 0}
-    for rnd in range(len(all_keys)):
-        print(f"Round {rnd}/{len(all_keys)}")
-        next_distances = {}
-        for state, steps in distances.items():
-            keys, pos = state
-            seen = set()
-            queue = [(pos, steps)]
-            while queue:
-                pos, steps = queue.pop(0)
-                if pos in seen:
-                    continue
-                seen.add(pos)
-                if mapping[pos] == '#' or (
-                    pos in all_doors and
-                    all_doors[pos].lower() not in keys
-                ):
-                    continue
-                if pos in all_keys and all_keys[pos] not in keys:
-                    found_keys = keys.union(all_keys[pos])
-                    state = (found_keys, pos)
-                    if state in next_distances:
-                        steps = min(steps, next_distances[state])
-                    next_distances[state] = steps
-                    continue
-                for move in Point.directions:
-                    queue.append((pos+move, steps+1))
-        distances = next_distances
-    return min(distances.values())
+    grid, start, all_doors, all_keys = parse_vault(inital)
+    return collect_keys(grid, (start,), all_doors, all_keys)
 
 
 def part2(inital):
-    mapping = []
-    all_doors = {}
-    all_keys = {}
-    start = None
-    for r, chars in enumerate(inital):
-        row = []
-        for c, char in enumerate(chars):
-            point = Point(c, r)
-            if char.upper() != char.lower() or char == '@':
-                if char == '@':
-                    assert start is None
-                    start = point
-                elif char.upper() == char:
-                    all_doors[point] = char
-                elif char.lower() == char:
-                    all_keys[point] = char
-                else:
-                    raise NotImplementedError
-                char = '.'
-            assert char in {'.', '#'}, "Not a valid map character"
-            row.append(char)
-        mapping.append(row)
-    mapping = tuple(mapping)
-    assert start is not None, "No start location found"
+    grid, start, all_doors, all_keys = parse_vault(inital)
+    width = grid.width
     starts = tuple(start+diff for diff in (
-        Point(1, 1),
-        Point(1, -1),
-        Point(-1, 1),
-        Point(-1, -1),
+        width + 1,
+        -width + 1,
+        width - 1,
+        -width - 1,
     ))
-    for diff in Point.directions + (Point(0, 0),):
-        mapping[start.y+diff.y][start.x+diff.x] = '#'
-    mapping = tuple(tuple(row) for row in mapping)
-    distances = {(frozenset(), starts): 0}
-    for rnd in range(len(all_keys)):
-        print(f"Round {rnd}/{len(all_keys)} -> {len(distances)}")
-        next_distances = {}
-        for state, state_steps in distances.items():
-            keys, bots = state
-            for b in range(len(bots)):
-                seen = set()
-                queue = [(bots[b], state_steps)]
-                while queue:
-                    pos, steps = queue.pop(0)
-                    if pos in seen:
-                        continue
-                    seen.add(pos)
-                    if mapping[pos.y][pos.x] == '#' or (
-                        pos in all_doors and
-                        all_doors[pos].lower() not in keys
-                    ):
-                        continue
-                    if pos in all_keys and all_keys[pos] not in keys:
-                        found_keys = keys.union(all_keys[pos])
-                        new_bots = list(bots)
-                        new_bots[b] = pos
-                        state = (found_keys, tuple(new_bots))
-                        if state in next_distances:
-                            steps = min(steps, next_distances[state])
-                        next_distances[state] = steps
-                        continue
-                    for move in Point.directions:
-                        queue.append((pos+move, steps+1))
-        distances = next_distances
-    return min(distances.values())
+    for index in (start,) + grid.neighbours[start]:
+        grid[index] = '#'
+    return collect_keys(grid, starts, all_doors, all_keys)
 
 
 TEST1 = """
@@ -165,9 +119,9 @@ TEST3 = """
 """
 
 if __name__ == '__main__':
-    # assert part1(line_parser(TEST1.strip(), parse=list)) == 8
-    # assert part1(line_parser(TEST2.strip(), parse=list)) == 86
+    assert part1(line_parser(TEST1.strip(), parse=list)) == 8
+    assert part1(line_parser(TEST2.strip(), parse=list)) == 86
     mapping = line_parser(get_input(18, 2019), parse=list)
-    # print(f"Part 1: {part1(mapping)}")
+    print(f"Part 1: {part1(mapping)}")
     assert part2(line_parser(TEST3.strip(), parse=list)) == 32
     print(f"Part 2: {part2(mapping)}")
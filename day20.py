@@ -1,76 +1,86 @@
 """Solution to day 20 of Advent of Code"""
 
-import collections
-import copy
-import itertools
-import re
+import string
 
 from get_input import get_input, line_parser
-from common import Point
+from common import Grid, Point
+import search
 
+OPEN = ord('.')
 
-def get_tag(point, lines, skip):
-    if lines[point.y+1][point.x].isalpha():
-        assert not lines[point.y][point.x+1].isalpha()
+
+def get_tag(point, grid, skip):
+    if grid.get(point+Point(0, 1), ' ').isalpha():
+        assert not grid.get(point+Point(1, 0), ' ').isalpha()
         diff = Point(0, 1)
-    elif lines[point.y][point.x+1].isalpha():
+    elif grid.get(point+Point(1, 0), ' ').isalpha():
         diff = Point(1, 0)
     else:
         raise Exception(f"No second char associated at {point}")
-    tag = lines[point.y][point.x] + lines[point.y+diff.y][point.x+diff.x]
+    tag = grid[point] + grid[point+diff]
     skip.add(point+diff)
 
     before = point-diff
-    after = point+Point(diff.x*2, diff.y*2)
+    after = point+diff+diff
     enter, exit = None, None
-    if before.x >= 0 and before.y > 0 and\
-            lines[before.y][before.x] == '.':
+    if grid.get(before) == '.':
         exit = before
         enter = point
-    elif 0 <= after.y < len(lines) and 0 <= after.x < len(lines[after.x]) and\
-            lines[after.y][after.x] == '.':
+    elif grid.get(after) == '.':
         exit = after
         enter = point+diff
     else:
         raise Exception(f"No entry assosciated with tag {tag} at {point}")
-    return tag, enter, exit
+    return tag, grid.index(*enter), grid.index(*exit)
 
 
 class Maze:
+    """The maze as a Grid, with portals and their tags by cell"""
+
     def __init__(self, lines):
-        self._map = {}
+        self.grid = Grid.from_rows(lines)
+        self.tags = {}
         self.portals = {}
-        self.size = Point(len(lines[0]), len(lines))
+        self.size = Point(self.grid.width, self.grid.height)
         skip = set()
-        for r, row in enumerate(lines):
-            for c, char in enumerate(row):
-                point = Point(c, r)
-                if point in skip:
-                    continue
-                if char.isalpha():
-                    char, enter, exit = get_tag(point, lines, skip)
-                    point = enter
-                    if char in self.portals:
-                        inner_enter, inner_exit = self.portals[char]
-                        if not self.is_inner(inner_enter):
-                            inner_exit, exit = exit, inner_exit
-                            inner_enter, enter = enter, inner_enter
-                        assert self.is_inner(inner_enter) and\
-                            not self.is_inner(enter)
-                        self.portals[char] = {
-                            inner_enter: (exit, +1),
-                            enter: (inner_exit, -1),
-                        }
-                    else:
-                        self.portals[char] = (enter, exit)
-                self._map[point] = char
-
-    def __getitem__(self, item):
-        if isinstance(item, Point):
-            return self._map[item]
-        return NotImplemented
-
-    def is_inner(self, point):
+        for index in self.grid.find_all(string.ascii_uppercase):
+            point = self.grid.point(index)
+            if point in skip:
+                continue
+            char, enter, exit = get_tag(point, self.grid, skip)
+            self.tags[enter] = char
+            if char in self.portals:
+                inner_enter, inner_exit = self.portals[char]
+                if not self.is_inner(inner_enter):
+                    inner_exit, exit = exit, inner_exit
+                    inner_enter, enter = enter, inner_enter
+                assert self.is_inner(inner_enter) and\
+                    not self.is_inner(enter)
+                self.portals[char] = {
+                    inner_enter: (exit, +1),
+                    enter: (inner_exit, -1),
+                }
+            else:
+                self.portals[char] = (enter, exit)
+
+    def exit(self, tag):
+        """The open cell next to the tag of AA or ZZ"""
+        enter, exit = self.portals[tag]
+        return exit
+
+    def moves(self, index):
+        """Open cells a step from index, through portals too, with the
+        change in depth each takes"""
+        for neighbour in self.grid.neighbours[index]:
+            tag = self.tags.get(neighbour)
+            if tag is None:
+                if self.grid.cells[neighbour] == OPEN:
+                    yield neighbour, 0
+            elif tag not in ('AA', 'ZZ'):
+                yield self.portals[tag][neighbour]
+
+    def is_inner(self, index):
+        point = self.grid.point(index)
         return (
             4 < point.x <= self.size.x-4 and
             4 < point.y <= self.size.y-4
@@ -79,51 +89,35 @@ class Maze:
 
 def part1(lines):
     mapping = Maze(lines)
-    no_exit, start = mapping.portals['AA']
-    queue = [(start, 0)]
-    seen = set([no_exit])
-    while queue:
-        pos, steps = queue.pop(0)
-        if pos in seen:
-            continue
-        seen.add(pos)
-        state = mapping[pos]
-        if state in '#':
-            continue
-        if state == 'ZZ':
-            return steps - 1
-        if state in mapping.portals:
-            queue.append((mapping.portals[state][pos][0], steps))
-            continue
-        assert state == '.'
-        for diff in Point.directions:
-            queue.append((pos+diff, steps+1))
-    raise Exception("No path found")
+    start, end = mapping.exit('AA'), mapping.exit('ZZ')
+    result = search.bfs(
+        [start],
+        lambda pos: [move for move, _ in mapping.moves(pos)],
+        lambda pos: pos == end,
+    )
+    if result.goal is None:
+        raise Exception("No path found")
+    return result.distance
 
 
 def part2(lines):
     mapping = Maze(lines)
-    no_exit, start = mapping.portals['AA']
-    queue = [(start, 0, 0)]
-    seen = set([(no_exit, 0)])
-    while queue:
-        pos, depth, steps = queue.pop(0)
-        if (pos, depth) in seen:
-            continue
-        seen.add((pos, depth))
-        state = mapping[pos]
-        if state == 'ZZ' and depth == 0:
-            return steps - 1
-        if depth < 0 or state in ('#', 'AA', 'ZZ'):
-            continue
-        if state in mapping.portals:
-            move, depth_diff = mapping.portals[state][pos]
-            queue.append((move, depth+depth_diff, steps))
-            continue
-        assert state == '.'
-        for diff in Point.directions:
-            queue.append((pos+diff, depth, steps+1))
-    raise Exception("No path found")
+    start, end = mapping.exit('AA'), mapping.exit('ZZ')
+
+    def neighbours(state):
+        pos, depth = state
+        for move, depth_diff in mapping.moves(pos):
+            if depth + depth_diff >= 0:
+                yield (move, depth + depth_diff), 1
+
+    # Every level to climb back out of takes at least a step
+    result = search.astar(
+        [(start, 0)], neighbours, lambda state: state == (end, 0),
+        heuristic=lambda state: state[1],
+    )
+    if result.goal is None:
+        raise Exception("No path found")
+    return result.distance
 
 
 def parse(line):
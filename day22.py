@@ -1,7 +1,6 @@
 """Solution to day 22 of Advent of Code"""
 
 from dataclasses import dataclass
-import collections
 import re
 
 from get_input import get_input, line_parser
@@ -1,45 +1,26 @@
 """Solution to day 24 of Advent of Code"""
 
-import collections
-import copy
-import re
-
 from get_input import get_input, line_parser
-from common import Point
+from common import Grid
 
 
 def part1(lines):
-    state = copy.deepcopy(lines)
+    grid = Grid.from_rows(lines)
+    cells = grid.cells
+    bug, empty = ord('#'), ord('.')
     seen = set()
     while True:
-        new_state = state
-        state = tuple(tuple(row) for row in state)
+        state = bytes(cells)
         if state in seen:
             break
         seen.add(state)
-        len_state = len(state)
-        len_row = len(state[0])
-        for r, row in enumerate(state):
-            for c, char in enumerate(row):
-                bugs = 0
-                for point in Point.directions:
-                    try:
-                        if 0 <= point.y+r < len_state and\
-                                0 <= point.x+c < len_row and\
-                                state[point.y+r][point.x+c] == '#':
-                            bugs += 1
-                    except IndexError:
-                        pass
-                if char == '#' and bugs != 1:
-                    new_state[r][c] = '.'
-                elif char == '.' and 1 <= bugs < 3:
-                    new_state[r][c] = '#'
-        state = new_state
-    total = 0
-    for n, char in enumerate(char for row in state for char in row):
-        if char == '#':
-            total += 2 ** n
-    return total
+        for index, adjacent in enumerate(grid.neighbours):
+            bugs = sum(state[n] == bug for n in adjacent)
+            if state[index] == bug and bugs != 1:
+                cells[index] = empty
+            elif state[index] == empty and 1 <= bugs < 3:
+                cells[index] = bug
+    return sum(2 ** n for n in grid.find_all('#'))
 
 
 def adjacent(pos):
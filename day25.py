@@ -3,105 +3,16 @@
 import collections
 import itertools
 import re
+import sys
 
-from get_input import get_input, line_parser
+from get_input import get_program
 from common import (
-        Done,
         IntcodeComputer,
-        IntcodeComputerMeta,
+        ProfilingTracer,
+        Status,
     )
 
 
-class IntcodeComputerDay25(IntcodeComputer):
-    def __init__(self, code, *args, **kwargs):
-        super().__init__(code, *args, **kwargs)
-        self.relative_base = 0
-        self.code = collections.defaultdict(int, enumerate(code))
-        self._idle = 0
-
-    @property
-    def idle(self):
-        return len(self.input) == 0 and self._idle > 2
-
-    @property
-    def args(self):
-        args = []
-        if self.func.needs_self:
-            args.append(self)
-        for n in range(self.func.n_args):
-            mode = (self.code[self.pointer] // 10**(n+2)) % 10
-            arg = self.code[self.pointer+1+n]
-            if mode == 0:
-                assert arg >= 0
-                arg = self.code[arg]
-            elif mode == 2:
-                assert self.relative_base+arg >= 0
-                arg = self.code[self.relative_base+arg]
-            args.append(arg)
-        return args
-
-    def step(self):
-        func = self.func
-        # import pdb; pdb.set_trace()
-        result = func(*self.args)
-        if result is not None:
-            assert isinstance(result, int)
-            pos = self.code[self.pointer+1+func.n_args]
-            if self.code[self.pointer] // 10**(2+self.func.n_args) == 2:
-                pos += self.relative_base
-            assert pos >= 0
-            self.code[pos] = result
-            self.pointer += 1
-        self.pointer += 1 + func.n_args
-
-    @IntcodeComputerMeta.opcode(1)
-    def add(a, b):
-        return a + b
-
-    @IntcodeComputerMeta.opcode(2)
-    def mult(a, b):
-        return a * b
-
-    @IntcodeComputerMeta.opcode(3)
-    def input(self):
-        if len(self.input) > 0:
-            self._idle = 0
-            return self.input.pop(0)
-        self._idle += 1
-        return -1
-
-    @IntcodeComputerMeta.opcode(4)
-    def output(self, a):
-        self.output.append(a)
-
-    @IntcodeComputerMeta.opcode(5)
-    def jump_if_true(self, a, b):
-        if a != 0:
-            self.pointer = b - 3
-
-    @IntcodeComputerMeta.opcode(6)
-    def jump_if_false(self, a, b):
-        if a == 0:
-            self.pointer = b - 3
-
-    @IntcodeComputerMeta.opcode(7)
-    def less_than(a, b):
-        return int(a < b)
-
-    @IntcodeComputerMeta.opcode(8)
-    def equals(a, b):
-        return int(a == b)
-
-    @IntcodeComputerMeta.opcode(9)
-    def relative_base_offset(self, a):
-        self.relative_base += a
-
-    @IntcodeComputerMeta.opcode(99)
-    def done(self):
-        self.done = True
-        raise Done
-
-
 class Player:
     blacklist = set([
         'giant electromagnet',
@@ -222,16 +133,13 @@ class Player:
         return 'west\n'
 
 
-def part1(code):
-    computer = IntcodeComputerDay25(code)
+def part1(code, tracer=None):
+    computer = IntcodeComputer(
+        code, tracer=tracer, input_callback=lambda: -1)
     player = Player()
     lines = []
-    while True:
-        try:
-            computer.step()
-        except Done:
-            break
-        if computer.output and computer.output[-1] == ord('\n'):
+    while computer.run_until_output() is not Status.HALTED:
+        if computer.output[-1] == ord('\n'):
             line = ''.join(chr(c) for c in computer.output)
             # print(line, end='')
             m = re.search(r'typing (\d+) on the keypad', line)
@@ -253,5 +161,8 @@ def part1(code):
 
 
 if __name__ == '__main__':
-    lines = line_parser(get_input(25, 2019), seperator=',')
-    print(f"Part 1: {part1(lines)}")
+    lines = get_program(25, 2019)
+    tracer = ProfilingTracer() if '--profile' in sys.argv else None
+    print(f"Part 1: {part1(lines, tracer)}")
+    if tracer is not None:
+        print(tracer.report(), file=sys.stderr)
@@ -0,0 +1,80 @@
+"""Puzzle input parsing for every day, so days can be run from one place"""
+
+import importlib
+
+from get_input import get_input, get_program, int_parser, line_parser
+
+YEAR = 2019
+
+
+def _ints(module, text):
+    return int_parser(text)
+
+
+def _program(module, text):
+    return line_parser(text, seperator=',')
+
+
+def _parsed_lines(module, text):
+    return line_parser(text, parse=module.parse)
+
+
+def _grid(module, text):
+    return line_parser(text, parse=list)
+
+
+def _parsed(module, text):
+    return module.parse(text)
+
+
+# day -> function of the day's module and its input text, giving the
+# argument to part1 and part2. Intcode programs are loaded through the
+# binary cache rather than parsed from the text.
+PARSERS = {
+    1: _ints,
+    2: _program,
+    3: _parsed_lines,
+    4: lambda module, text: line_parser(text, seperator='-'),
+    5: _program,
+    6: _parsed_lines,
+    7: _program,
+    8: lambda module, text: tuple(text.strip()),
+    9: _program,
+    10: _parsed,
+    11: _program,
+    12: _parsed_lines,
+    13: _program,
+    14: _parsed_lines,
+    15: _program,
+    16: _parsed,
+    17: _program,
+    18: _grid,
+    19: _program,
+    20: lambda module, text: line_parser(text, seperator='\n', parse=list),
+    21: _program,
+    22: _parsed_lines,
+    23: _program,
+    24: _grid,
+    25: _program,
+}
+
+
+def module(day):
+    return importlib.import_module(f"day{day:02}")
+
+
+def parts(day):
+    """The part functions a day's module has, as (part, function)"""
+    mod = module(day)
+    return [
+        (part, getattr(mod, f"part{part}"))
+        for part in (1, 2) if hasattr(mod, f"part{part}")
+    ]
+
+
+def load(day, year=YEAR):
+    """Parsed input for a day"""
+    parser = PARSERS[day]
+    if parser is _program:
+        return get_program(day, year)
+    return parser(module(day), get_input(day, year))
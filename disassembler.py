@@ -0,0 +1,223 @@
+"""Static disassembly and control flow analysis of Intcode programs"""
+
+import collections
+import sys
+
+from common import IntcodeComputer, format_instruction
+from get_input import get_program
+
+
+class Instruction(collections.namedtuple(
+        'Instruction', 'address func params target')):
+
+    @property
+    def size(self):
+        return 1 + len(self.params) + (self.target is not None)
+
+    @property
+    def cells(self):
+        return range(self.address, self.address + self.size)
+
+    def __str__(self):
+        return format_instruction(self.func, self.params, self.target)
+
+
+# successors is None when the block ends in a jump to a computed address
+Block = collections.namedtuple('Block', 'start instructions successors')
+
+
+class ControlFlowGraph:
+    """Instructions reachable from address 0, split into basic blocks
+
+    Reachability follows fall through and jumps to immediate addresses.
+    Jumps to computed addresses (returns, mostly) can't be followed, so
+    constants the program stores that decode as instructions are taken as
+    possible targets too. Everything in the program that isn't part of a
+    reached instruction counts as data.
+    """
+
+    def __init__(self, code, computer=IntcodeComputer):
+        self.code = list(code)
+        self._computer = computer(self.code)
+        self.instructions = {}
+        self.jump_targets = set()
+        # Jumps whose target is read from memory
+        self.indirect_jumps = set()
+        # Constants stored by the program that might be jumped to
+        self.indirect_targets = set()
+        self._explore([0])
+        guesses = self._stored_constants() - set(self.instructions)
+        self.indirect_targets = {
+            address for address in guesses if self._decode(address)
+        }
+        self._explore(self.indirect_targets)
+        self.blocks = self._split_blocks()
+
+    def _decode(self, address):
+        if not 0 <= address < len(self.code):
+            return None
+        try:
+            return Instruction(address, *self._computer.decode(address))
+        except KeyError:
+            return None
+
+    def _explore(self, starts):
+        todo = list(starts)
+        while todo:
+            address = todo.pop()
+            while address not in self.instructions:
+                instruction = self._decode(address)
+                if instruction is None:
+                    break
+                self.instructions[address] = instruction
+                targets, falls_through = self._branches(instruction)
+                for target in targets:
+                    self.jump_targets.add(target)
+                    todo.append(target)
+                if not falls_through:
+                    break
+                address += instruction.size
+
+    def _branches(self, instruction):
+        """Static jump targets of an instruction, and whether execution
+        can carry on to the next one"""
+        func = instruction.func
+        if func.opcode == 99:
+            return [], False
+        if not func.jumps:
+            return [], True
+        (cond_mode, cond), (target_mode, target) = instruction.params
+        if cond_mode == 1:
+            taken = func(cond, True) is not None
+            falls_through = not taken
+        else:
+            taken = falls_through = True
+        if not taken:
+            return [], True
+        if target_mode != 1:
+            self.indirect_jumps.add(instruction.address)
+            return [], falls_through
+        return [target], falls_through
+
+    def _stored_constants(self):
+        """Immediate values written unchanged by an add or multiply"""
+        constants = set()
+        for instruction in self.instructions.values():
+            if instruction.func.opcode not in (1, 2):
+                continue
+            identity = 0 if instruction.func.opcode == 1 else 1
+            (mode_a, a), (mode_b, b) = instruction.params
+            if mode_a == mode_b == 1:
+                if b == identity:
+                    constants.add(a)
+                if a == identity:
+                    constants.add(b)
+        return constants
+
+    def _split_blocks(self):
+        leaders = {0} | self.jump_targets | self.indirect_targets
+        for instruction in self.instructions.values():
+            if instruction.func.jumps or instruction.func.opcode == 99:
+                leaders.add(instruction.address + instruction.size)
+        blocks = {}
+        for start in sorted(leaders & set(self.instructions)):
+            address = start
+            instructions = []
+            while True:
+                instruction = self.instructions[address]
+                instructions.append(instruction)
+                address += instruction.size
+                targets, falls_through = self._branches(instruction)
+                if instruction.func.jumps or instruction.func.opcode == 99:
+                    break
+                if address in leaders or address not in self.instructions:
+                    break
+            if instruction.address in self.indirect_jumps:
+                successors = None
+            else:
+                successors = targets + (
+                    [address] if falls_through and
+                    address in self.instructions else [])
+            blocks[start] = Block(start, instructions, successors)
+        return blocks
+
+    @property
+    def code_cells(self):
+        return {
+            cell for instruction in self.instructions.values()
+            for cell in instruction.cells
+        }
+
+    @property
+    def data_cells(self):
+        return set(range(len(self.code))) - self.code_cells
+
+    @property
+    def self_modifying_writes(self):
+        """(instruction, address) for writes to fixed addresses in code"""
+        code = self.code_cells
+        return [
+            (instruction.address, instruction.target[1])
+            for instruction in self.instructions.values()
+            if instruction.target is not None
+            and instruction.target[0] == 0
+            and instruction.target[1] in code
+        ]
+
+    @property
+    def indirect_writes(self):
+        """Instructions writing relative to the relative base, which
+        static analysis can't place"""
+        return [
+            instruction.address
+            for instruction in self.instructions.values()
+            if instruction.target is not None and instruction.target[0] == 2
+        ]
+
+    @property
+    def pure(self):
+        """Whether the program can be seen statically to never rewrite its
+        own code, so its output depends only on its input
+
+        Relative writes can't be placed, so any of them could land in code
+        and a program with them doesn't count as pure.
+        """
+        return not self.self_modifying_writes and not self.indirect_writes
+
+    def disassemble(self):
+        """Listing of the program, code as instructions and the rest as
+        data"""
+        lines = []
+        address = 0
+        while address < len(self.code):
+            instruction = self.instructions.get(address)
+            if instruction is None:
+                lines.append(f"{address:>6}  data {self.code[address]}")
+                address += 1
+                continue
+            if address in self.blocks:
+                successors = self.blocks[address].successors
+                lines.append(f"{'':>6}block {address} -> " + (
+                    "?" if successors is None
+                    else ", ".join(map(str, successors)) or "halt"))
+            lines.append(f"{address:>6}  {instruction}")
+            address += instruction.size
+        return lines
+
+    def summary(self):
+        return (
+            f"{len(self.instructions)} instructions in {len(self.blocks)} "
+            f"blocks, {len(self.code_cells)} code cells, "
+            f"{len(self.data_cells)} data cells, "
+            f"{len(self.indirect_jumps)} indirect jumps, "
+            f"{len(self.self_modifying_writes)} self modifying writes, "
+            f"{len(self.indirect_writes)} relative writes"
+        )
+
+
+if __name__ == '__main__':
+    for day in map(int, sys.argv[1:]):
+        graph = ControlFlowGraph(get_program(day, 2019))
+        print("\n".join(graph.disassemble()))
+        print(f"Day {day}: {graph.summary()}, "
+              f"{'pure' if graph.pure else 'possibly self modifying'}")
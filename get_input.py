@@ -1,32 +1,320 @@
 """Module for getting the input for advent of code"""
 
+from array import array
+import codecs
+import functools
+import json
 import logging
 import os
-import requests
+import time
+
+# requests, NumPy and the modules only needed to download or write the
+# cache are imported where they're used, keeping the cached path quick
+# to start
 
 SESSION_FILE = '.token'
 AOC_URL = "http://adventofcode.com"
+CACHE_ENV = 'AOC_CACHE'
+INDEX_DIR = 'index'
+# Single file index written by earlier versions, still read
+LEGACY_INDEX_FILE = 'index.json'
 LOG = logging.getLogger(__name__)
+# Read once, as it can only be read by setting it
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+def cache_root():
+    """Directory inputs are cached in, $AOC_CACHE or ~/.cache/aoc
+
+    Each input lives in a directory named by the hash of its text, beside
+    anything derived from it. The index has a file for each year and day
+    naming the hash, so processes adding different days never write the
+    same file.
+    """
+    return os.environ.get(CACHE_ENV) or os.path.join(
+        os.path.expanduser('~'), '.cache', 'aoc')
+
+def input_file(day, year):
+    """Where inputs used to be cached, in the working directory"""
+    return f".AoC-{year:04}-{day:02}.tmp"
+
+def input_hash(day, year, download=True):
+    """Hash of a day's input, caching the input first if need be
+
+    Inputs left in the working directory by older versions are copied
+    into the cache. Returns None if the input isn't cached and download is
+    false.
+    """
+    entry = _read_index(day, year)
+    if entry is not None and os.path.exists(
+            os.path.join(cache_root(), entry['hash'], 'input')):
+        return entry['hash']
+    try:
+        with open(input_file(day, year), 'r') as file_handle:
+            return _store_input(day, year, file_handle.read())
+    except FileNotFoundError:
+        pass
+    if not download:
+        return None
+    LOG.warning("Attempting to download file from AOC")
+    return _store_input(day, year, _download(_session(), day, year))
+
+def artifact_path(day, year, name):
+    """Path for a file derived from a day's input, kept beside it"""
+    return os.path.join(cache_root(), input_hash(day, year), name)
 
 def get_input(day, year):
     """Get the input for a specific day and year from advent of code"""
-    file_name = f".AoC-{year:04}-{day:02}.tmp"
+    with open_input(day, year) as file_handle:
+        return file_handle.read()
+
+def open_input(day, year, mode='r'):
+    """Open the cached input, for reading it a piece at a time"""
+    return open(artifact_path(day, year, 'input'), mode)
+
+def prefetch(year, days=range(1, 26), workers=4, url=None, retries=3,
+             backoff=1.0):
+    """Download every missing input for the given days, workers at a time
+    over one session, returning the days fetched"""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    missing = [
+        day for day in days if input_hash(day, year, download=False) is None
+    ]
+    if not missing:
+        return []
+    session = _session(workers)
+    failures = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_download, session, day, year, url, retries, backoff):
+            day for day in missing
+        }
+        for future in as_completed(futures):
+            day = futures[future]
+            try:
+                _store_input(day, year, future.result())
+            except RuntimeError as error:
+                failures[day] = error
+    session.close()
+    if failures:
+        raise RuntimeError(f"Could not get days {sorted(failures)}: "
+                           f"{list(failures.values())}")
+    return missing
+
+@functools.lru_cache(maxsize=None)
+def _token():
+    with open(SESSION_FILE) as fh:
+        return fh.read().strip()
+
+def _session(pool_size=1):
+    import requests
+    session = requests.Session()
+    session.cookies.set('session', _token())
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def _download(session, day, year, url=None, retries=3, backoff=1.0):
+    """Text of an input, retrying connection errors, rate limits and server
+    errors with exponential backoff"""
+    import requests
+    url = f"{url or AOC_URL}/{year}/day/{day}/input"
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            response = session.get(url, timeout=30)
+        except requests.RequestException as error:
+            reason = repr(error)
+            continue
+        if response.ok:
+            return response.text
+        reason = f"{response.status_code}: {response.reason}"
+        if response.status_code < 500 and response.status_code != 429:
+            break
+    raise RuntimeError(f"Could not get {url}: {reason}")
+
+def _index_file(day, year):
+    return os.path.join(cache_root(), INDEX_DIR, f"{year:04}-{day:02}.json")
+
+def _read_index(day, year):
+    """Index entry for a day, or None if it isn't cached"""
+    try:
+        with open(_index_file(day, year)) as file_handle:
+            return json.load(file_handle)
+    except FileNotFoundError:
+        pass
     try:
-        with open(file_name, 'r') as file_handle:
-            return file_handle.read()
+        with open(os.path.join(cache_root(), LEGACY_INDEX_FILE)) as fh:
+            return json.load(fh).get(f"{year:04}-{day:02}")
     except FileNotFoundError:
-        LOG.warning("Attempting to download file from AOC")
+        return None
 
-    url = f"{AOC_URL}/{year}/day/{day}/input"
-    with open(SESSION_FILE) as fh:
-        session = fh.read().strip()
-    response = requests.get(url, cookies=dict(session=session))
-    if not response.ok:
-        raise RuntimeError(f"Could not get {url}: {response.status_code}: {response.reason}")
-    with open(file_name, 'w') as file_handle:
-        file_handle.write(response.text)
-    return response.text
+def _store_input(day, year, text):
+    """Add an input to the cache and the index, returning its hash"""
+    import hashlib
+    data = text.encode()
+    digest = hashlib.sha256(data).hexdigest()
+    directory = os.path.join(cache_root(), digest)
+    os.makedirs(directory, exist_ok=True)
+    write_atomic(os.path.join(directory, 'input'), text)
+    os.makedirs(os.path.join(cache_root(), INDEX_DIR), exist_ok=True)
+    write_atomic(_index_file(day, year), json.dumps({
+        'hash': digest,
+        'size': len(data),
+        'fetched': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }, indent=1, sort_keys=True))
+    return digest
+
+def write_atomic(file_name, data):
+    """Write a file so readers only ever see all of it or none of it"""
+    import tempfile
+    fd, temp_name = tempfile.mkstemp(
+        dir=os.path.dirname(file_name) or '.',
+        prefix=os.path.basename(file_name), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as fh:
+            fh.write(data)
+        # mkstemp makes the file private, give it the usual permissions
+        os.chmod(temp_name, 0o666 & ~_UMASK)
+        os.replace(temp_name, file_name)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
 
 def line_parser(text, parse=int, seperator='\n'):
     """Parse lines, usually into base 10 integers by lines"""
     return [parse(item) for item in text.split(seperator) if item != '']
+
+def iter_parser(source, parse=int, seperator='\n', chunk_size=1 << 16):
+    """Parse items one at a time, like line_parser but as a generator
+
+    source is a string or anything with read(), such as a text or binary
+    file or an mmap, and is consumed chunk_size at a time, so only one
+    chunk and the item it ends in are held at once.
+    """
+    if isinstance(source, str):
+        chunks = (
+            source[start:start+chunk_size]
+            for start in range(0, len(source), chunk_size)
+        )
+    else:
+        chunks = _read_chunks(source, chunk_size)
+    rest = ''
+    for chunk in chunks:
+        items = (rest + chunk).split(seperator)
+        rest = items.pop()
+        for item in items:
+            if item != '':
+                yield parse(item)
+    if rest != '':
+        yield parse(rest)
+
+def _read_chunks(file_handle, chunk_size):
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        data = file_handle.read(chunk_size)
+        if not data:
+            break
+        if isinstance(data, bytes):
+            data = decoder.decode(data)
+        yield data
+
+def int_parser(text, seperator='\n'):
+    """Parse integers straight into an array('q'), with NumPy when it's
+    installed, raising OverflowError for values that don't fit 64 bits"""
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    if numpy is not None:
+        try:
+            values = numpy.fromstring(text, dtype=numpy.int64, sep=seperator)
+        except ValueError:
+            values = None
+        # NumPy takes any whitespace between items too, and saturates
+        # rather than failing on overflow, so anything that doesn't give
+        # one value per item is left to the exact parse below
+        items = text.count(seperator) + 1 - text.endswith(seperator)
+        limits = numpy.iinfo(numpy.int64)
+        if values is not None and len(values) == items and not (
+                (values == limits.max) | (values == limits.min)).any():
+            return array('q', values.tobytes())
+    return array('q', map(int, filter(None, text.split(seperator))))
+
+def get_program(day, year):
+    """Get an Intcode input as a list of ints
+
+    The parsed program is kept beside the input in the cache as a file of
+    64 bit ints, and loaded from there with a single read.
+    """
+    binary_name = artifact_path(day, year, 'program.q')
+    try:
+        with open(binary_name, 'rb') as file_handle:
+            program = array('q')
+            program.frombytes(file_handle.read())
+            return program.tolist()
+    except FileNotFoundError:
+        pass
+    program = line_parser(get_input(day, year), seperator=',')
+    try:
+        data = array('q', program)
+    except OverflowError:
+        return program
+    write_atomic(binary_name, data.tobytes())
+    return program
+
+def test_prefetch(tmp_path, monkeypatch):
+    """prefetch against a stand-in server, which fails day 2 once with a
+    503 and doesn't have day 4"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import threading
+    import pytest
+    requests_seen = []
+    active = [0, 0]
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                requests_seen.append(self.path)
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            day = int(self.path.split('/')[3])
+            if day == 4 or (day == 2 and requests_seen.count(self.path) == 1):
+                self.send_response(404 if day == 4 else 503)
+                self.end_headers()
+                return
+            body = f"{day}\n".encode() * 1000
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv(CACHE_ENV, str(tmp_path / 'cache'))
+    (tmp_path / SESSION_FILE).write_text('token')
+    _token.cache_clear()
+    try:
+        with pytest.raises(RuntimeError, match='404'):
+            prefetch(2019, range(1, 6),
+                     url=f"http://127.0.0.1:{server.server_port}",
+                     backoff=0.01)
+    finally:
+        server.shutdown()
+        server.server_close()
+        _token.cache_clear()
+    assert active[1] > 1
+    assert requests_seen.count('/2019/day/2/input') == 2
+    assert input_hash(4, 2019, download=False) is None
+    for day in (1, 2, 3, 5):
+        assert get_input(day, 2019) == f"{day}\n" * 1000
@@ -0,0 +1,167 @@
+"""Intcode computer that compiles straight-line code into Python functions"""
+
+from common import IntcodeComputer, Status
+
+
+class CompiledIntcodeComputer(IntcodeComputer):
+    """IntcodeComputer that runs basic blocks as compiled Python
+
+    A block starts wherever execution arrives and runs until a jump, or
+    until an instruction without a source template in the opcode table
+    (input, output and halt), which is left to the interpreter. Each block
+    is translated to a function that returns the next pointer. Writes into
+    a compiled block drop it, and it's recompiled the next time it runs,
+    unless it has been dropped more than max_recompiles times already, in
+    which case it's left to the interpreter from then on. Single stepping
+    and tracing fall back to the interpreter.
+    """
+    __slots__ = ('_blocks', '_block_cells', '_recompiles')
+    max_recompiles = 3
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # pointer -> compiled block, None if it starts with an instruction
+        # that has to be interpreted
+        self._blocks = {}
+        # cell -> pointers of blocks compiled from that cell
+        self._block_cells = {}
+        # pointer -> times the block starting there has been dropped
+        self._recompiles = {}
+
+    def fork(self):
+        clone = super().fork()
+        clone._blocks = self._blocks.copy()
+        clone._block_cells = self._block_cells.copy()
+        clone._recompiles = self._recompiles.copy()
+        return clone
+
+    def _invalidate(self, address):
+        super()._invalidate(address)
+        block_cells = self._block_cells
+        for start in block_cells.pop(address, ()):
+            block = self._blocks.pop(start)
+            self._recompiles[start] = self._recompiles.get(start, 0) + 1
+            end = start + 1 if block is None else block.end
+            # The block's other cells no longer lead to it
+            for cell in range(start, end):
+                if cell == address:
+                    continue
+                starts = tuple(s for s in block_cells[cell] if s != start)
+                if starts:
+                    block_cells[cell] = starts
+                else:
+                    del block_cells[cell]
+
+    def _run(self, steps=None, outputs=None, until_input=False):
+        if steps is not None or self.tracer is not None:
+            return super()._run(steps, outputs, until_input)
+        blocks = self._blocks
+        while True:
+            pointer = self.pointer
+            try:
+                block = blocks[pointer]
+            except KeyError:
+                block = self._compile(pointer)
+            if block is not None:
+                self.pointer = block(self, self.code, self._decoded_cells)
+                continue
+            is_output = self.decode(pointer)[0].opcode == 4
+            status = super()._run(steps=1, until_input=until_input)
+            if status is not Status.RUNNING:
+                return status
+            if is_output and outputs is not None:
+                outputs -= 1
+                if outputs == 0:
+                    return Status.OUTPUT
+
+    def _compile(self, start):
+        if self._recompiles.get(start, 0) > self.max_recompiles:
+            # Rewritten too often to be worth compiling again
+            self._blocks[start] = None
+            return None
+        lines = []
+        uses_rb = sets_rb = False
+        pointer = start
+        while True:
+            try:
+                func, params, target = self.decode(pointer)
+            except KeyError:
+                break
+            if func.source is None:
+                break
+            lines.append(f"# {pointer}: {func.name}")
+            args = [
+                self._operand(n, mode, value, lines)
+                for n, (mode, value) in enumerate(params)
+            ]
+            uses_rb |= any(mode == 2 for mode, _ in params)
+            source = func.source.format(*args)
+            pointer += 1 + len(params)
+            if func.writes:
+                pointer += 1
+                mode, value = target
+                uses_rb |= mode == 2
+                address = value if mode == 0 else f"rb + {value}"
+                lines.extend([
+                    f"value = {source}",
+                    f"address = {address}",
+                    "assert address >= 0",
+                    "try:",
+                    "    code[address] = value",
+                    "except (IndexError, OverflowError):",
+                    "    self._store(address, value)",
+                    "    code = self.code",
+                    f"page = address >> {self.decode_page_bits}",
+                    "if page < len(cells) and address in cells[page]:",
+                    "    self._invalidate(address)",
+                    f"    return {pointer}",
+                ])
+            elif func.jumps:
+                lines.extend([f"if {source}:", f"    return {args[1]}"])
+                break
+            else:
+                uses_rb = sets_rb = True
+                lines.append(source)
+        end = max(pointer, start + 1)
+        for cell in range(start, end):
+            self._block_cells[cell] = \
+                self._block_cells.get(cell, ()) + (start,)
+        if pointer == start:
+            self._blocks[start] = None
+            return None
+        lines.append(f"return {pointer}")
+        if sets_rb:
+            # Every return has to store the relative base
+            lines = [
+                line.replace("return ", "self.relative_base = rb; return ")
+                for line in lines
+            ]
+        if uses_rb:
+            lines.insert(0, "rb = self.relative_base")
+        source = f"def block_{start}(self, code, cells):\n" + \
+            "".join(f"    {line}\n" for line in lines)
+        namespace = {}
+        exec(compile(source, f"<intcode block {start}>", "exec"), namespace)
+        block = namespace[f"block_{start}"]
+        block.source = source
+        block.end = end
+        self._blocks[start] = block
+        return block
+
+    def _operand(self, n, mode, value, lines):
+        """Python expression for an argument, adding any statements needed
+        to read it to lines"""
+        if mode == 1:
+            return repr(value)
+        if mode == 0 and 0 <= value < len(self.code):
+            # Memory only grows, so this read can't go out of range
+            return f"code[{value}]"
+        address = value if mode == 0 else f"rb + {value}"
+        lines.extend([
+            f"assert {address} >= 0",
+            "try:",
+            f"    arg{n} = code[{address}]",
+            "except IndexError:",
+            f"    arg{n} = 0",
+        ])
+        return f"arg{n}"
@@ -0,0 +1,136 @@
+"""Intcode interpreter running many copies of one program on NumPy arrays"""
+
+import numpy as np
+
+from common import IntcodeComputer, Status
+
+# Vectorised versions of the opcodes, arity and flags come from the table
+WRITES = {
+    1: np.add,
+    2: np.multiply,
+    7: lambda a, b: (a < b).astype(np.int64),
+    8: lambda a, b: (a == b).astype(np.int64),
+}
+JUMPS = {
+    5: lambda a: a != 0,
+    6: lambda a: a == 0,
+}
+STATUSES = (Status.RUNNING, Status.HALTED, Status.NEEDS_INPUT, Status.OUTPUT)
+RUNNING, HALTED, NEEDS_INPUT, OUTPUT = range(len(STATUSES))
+
+
+class IntcodeLanes:
+    """Runs one program in many lanes, each with its own memory and input
+
+    Every step takes the lowest pointer of the running lanes and executes
+    the instruction there for all lanes at that pointer at once, gathering
+    and scattering across the memory matrix. Lanes that have diverged are
+    masked out until the others catch up. Values are int64, so programs
+    have to stay within 64 bits.
+    """
+
+    def __init__(self, code, lanes, inputs=None):
+        self.memory = np.tile(np.array(code, dtype=np.int64), (lanes, 1))
+        self.pointer = np.zeros(lanes, dtype=np.int64)
+        self.relative_base = np.zeros(lanes, dtype=np.int64)
+        self.state = np.full(lanes, RUNNING, dtype=np.int8)
+        if inputs is None:
+            inputs = np.zeros((lanes, 0), dtype=np.int64)
+        self.input = np.array(inputs, dtype=np.int64).reshape(lanes, -1)
+        self.output = np.zeros((lanes, 1), dtype=np.int64)
+        self.n_read = np.zeros(lanes, dtype=np.int64)
+        self.n_output = np.zeros(lanes, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.pointer)
+
+    def status(self, lane):
+        return STATUSES[self.state[lane]]
+
+    def outputs(self, lane):
+        return self.output[lane, :self.n_output[lane]].tolist()
+
+    def run(self, outputs=None):
+        """Run until every lane has halted, run out of input or, if given,
+        output that many values"""
+        running = self.state == RUNNING
+        while running.any():
+            pointer = int(self.pointer[running].min())
+            self._grow(pointer + 4)
+            lanes = np.flatnonzero(running & (self.pointer == pointer))
+            instructions = self.memory[lanes, pointer]
+            opcodes = instructions % 100
+            for opcode in np.unique(opcodes):
+                same = opcodes == opcode
+                self._execute(
+                    int(opcode), pointer, lanes[same], instructions[same])
+            if outputs is not None:
+                done = (self.state == RUNNING) & (self.n_output >= outputs)
+                self.state[done] = OUTPUT
+            running = self.state == RUNNING
+
+    def _execute(self, opcode, pointer, lanes, instructions):
+        func = IntcodeComputer.op_codes[opcode]
+        if opcode == 99:
+            self.state[lanes] = HALTED
+            return
+        args = [
+            self._operand(lanes, pointer, instructions, n)
+            for n in range(func.n_args)
+        ]
+        if opcode == 3:
+            ready = self.n_read[lanes] < self.input.shape[1]
+            self.state[lanes[~ready]] = NEEDS_INPUT
+            lanes, instructions = lanes[ready], instructions[ready]
+            value = self.input[lanes, self.n_read[lanes]]
+            self.n_read[lanes] += 1
+        elif opcode == 4:
+            if self.n_output.max() >= self.output.shape[1]:
+                self.output = np.pad(
+                    self.output, ((0, 0), (0, self.output.shape[1])))
+            self.output[lanes, self.n_output[lanes]] = args[0]
+            self.n_output[lanes] += 1
+        elif opcode == 9:
+            self.relative_base[lanes] += args[0]
+        elif func.writes:
+            value = WRITES[opcode](*args)
+
+        size = 1 + func.n_args
+        if func.writes:
+            address = self._address(
+                lanes, pointer+size, instructions // 10**(size+1) % 10)
+            self._grow(address.max(initial=0) + 1)
+            self.memory[lanes, address] = value
+            size += 1
+        if func.jumps:
+            self.pointer[lanes] = np.where(
+                JUMPS[opcode](args[0]), args[1], pointer + size)
+        else:
+            self.pointer[lanes] = pointer + size
+
+    def _address(self, lanes, cell, mode):
+        address = self.memory[lanes, cell]
+        address = np.where(mode == 2, address + self.relative_base[lanes],
+                           address)
+        assert (address >= 0).all()
+        return address
+
+    def _operand(self, lanes, pointer, instructions, n):
+        mode = instructions // 10**(n+2) % 10
+        value = self.memory[lanes, pointer+1+n]
+        positional = mode != 1
+        if positional.any():
+            address = self._address(
+                lanes[positional], pointer+1+n, mode[positional])
+            # Cells past the end read as 0, memory only grows on writes
+            inside = address < self.memory.shape[1]
+            read = np.zeros(len(address), dtype=np.int64)
+            read[inside] = self.memory[
+                lanes[positional][inside], address[inside]]
+            value[positional] = read
+        return value
+
+    def _grow(self, size):
+        if size > self.memory.shape[1]:
+            extra = max(size, 2 * self.memory.shape[1]) - self.memory.shape[1]
+            self.memory = np.pad(self.memory, ((0, 0), (0, extra)))
@@ -0,0 +1,152 @@
+"""Runs any set of days and parts at once, in a pool of processes
+
+    python runner.py [-j WORKERS] [--no-cache] [DAY[.PART] ...]
+
+Answers are cached beside each input, keyed by a hash of the source, so
+days that haven't changed since their last run come back straight away.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+import days
+from get_input import artifact_path, write_atomic
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+ANSWERS_FILE = 'answers.json'
+
+
+def source_hash(day):
+    """Hash of a day's module and every shared module beside it"""
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(SOURCE_DIR, '*.py'))):
+        name = os.path.basename(path)
+        if re.fullmatch(r'day\d\d\.py', name) and name != f"day{day:02}.py":
+            continue
+        digest.update(name.encode())
+        with open(path, 'rb') as file_handle:
+            digest.update(file_handle.read())
+    return digest.hexdigest()
+
+
+def load_answers(day):
+    try:
+        with open(artifact_path(day, days.YEAR, ANSWERS_FILE)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def save_answers(day, answers):
+    write_atomic(artifact_path(day, days.YEAR, ANSWERS_FILE),
+                 json.dumps(answers, indent=1, sort_keys=True))
+
+
+def run_part(day, part):
+    """Answer and time taken for one part, run in a worker"""
+    data = days.load(day)
+    func = dict(days.parts(day))[part]
+    start = time.perf_counter()
+    answer = func(data)
+    return answer, time.perf_counter() - start
+
+
+def parse_selection(selection):
+    """(day, part) pairs for arguments like 7 or 7.2"""
+    parts = []
+    for item in selection or map(str, sorted(days.PARSERS)):
+        day, _, part = item.partition('.')
+        if not day.isdigit() or not (part == '' or part.isdigit()):
+            raise ValueError(f"Not a day or part: {item}")
+        day = int(day)
+        if day not in days.PARSERS:
+            raise ValueError(f"No day {day}")
+        available = [n for n, _ in days.parts(day)]
+        if part:
+            if int(part) not in available:
+                raise ValueError(f"Day {day} has no part {part}")
+            available = [int(part)]
+        parts.extend((day, n) for n in available)
+    return parts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('parts', nargs='*', metavar='DAY[.PART]')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="processes to run in, one per CPU by default")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="run every part even if its answer is cached")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = {}
+    answers = {}
+    hashes = {}
+    todo = []
+    try:
+        selection = parse_selection(args.parts)
+    except (ValueError, ImportError) as error:
+        parser.error(str(error))
+    for day, part in selection:
+        if day not in hashes:
+            hashes[day] = source_hash(day)
+            try:
+                answers[day] = load_answers(day)
+            except (FileNotFoundError, RuntimeError) as error:
+                answers[day] = error
+        if isinstance(answers[day], Exception):
+            results[day, part] = (None, None, answers[day])
+            continue
+        key = f"{hashes[day]}:{part}"
+        if not args.no_cache and key in answers[day]:
+            results[day, part] = (answers[day][key], None, None)
+        else:
+            todo.append((day, part))
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_part, *task): task for task in todo}
+        for future in as_completed(futures):
+            day, part = futures[future]
+            try:
+                answer, elapsed = future.result()
+            except Exception as error:
+                results[day, part] = (None, None, error)
+                continue
+            results[day, part] = (answer, elapsed, None)
+            try:
+                json.dumps(answer)
+            except TypeError:
+                continue
+            answers[day] = {
+                key: value for key, value in answers[day].items()
+                if key.startswith(hashes[day])
+            }
+            answers[day][f"{hashes[day]}:{part}"] = answer
+            save_answers(day, answers[day])
+
+    total = 0
+    for (day, part), (answer, elapsed, error) in sorted(results.items()):
+        if error is not None:
+            print(f"{day:>2}.{part}  failed: {error!r}")
+            continue
+        if elapsed is None:
+            timing = "cached"
+        else:
+            timing = f"{elapsed:.3f}s"
+            total += elapsed
+        print(f"{day:>2}.{part}  {answer!s:<20} {timing:>10}")
+    print(f"{len(results)} parts, {total:.3f}s of solving in "
+          f"{time.perf_counter() - start:.3f}s")
+    return 1 if any(error for _, _, error in results.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
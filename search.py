@@ -0,0 +1,94 @@
+"""Graph searches shared between days
+
+Every search takes its start nodes, a neighbours function and optionally
+a goal test, a function of a node that's true once it is reached. Nodes
+can be anything hashable. The searches stop at the first goal they reach,
+or explore everything reachable without one, and count the nodes they
+expand so strategies can be compared on the same problem.
+"""
+
+import collections
+import heapq
+import itertools
+
+# goal is the goal node reached, or None, and distance its distance.
+# distances has every node reached, expanded or not.
+Result = collections.namedtuple('Result', 'goal distance distances expanded')
+
+
+def bfs(starts, neighbours, goal=None):
+    """Breadth first search, where neighbours(node) gives the nodes one
+    step from node
+
+    Nodes are marked seen as they're queued, so each is queued once, and
+    a goal is recognised as soon as it's found rather than when it comes
+    off the queue.
+    """
+    distances = {}
+    queue = collections.deque()
+    for start in starts:
+        if start in distances:
+            continue
+        distances[start] = 0
+        if goal is not None and goal(start):
+            return Result(start, 0, distances, 0)
+        queue.append(start)
+    expanded = 0
+    while queue:
+        node = queue.popleft()
+        expanded += 1
+        steps = distances[node] + 1
+        for neighbour in neighbours(node):
+            if neighbour in distances:
+                continue
+            distances[neighbour] = steps
+            if goal is not None and goal(neighbour):
+                return Result(neighbour, steps, distances, expanded)
+            queue.append(neighbour)
+    return Result(None, None, distances, expanded)
+
+
+def astar(starts, neighbours, goal=None, heuristic=None):
+    """A* search, where neighbours(node) gives (neighbour, cost) pairs
+
+    heuristic(node) estimates the cost left to a goal, and has to never
+    overestimate it for the result to be the shortest. Without one this
+    is Dijkstra's algorithm. A node is queued again whenever a cheaper
+    way to it is found, even once it has been expanded, which a heuristic
+    that isn't consistent can make happen. Entries made stale by that are
+    dropped when they come off the heap rather than expanded.
+    """
+    distances = {}
+    heap = []
+    # Breaks ties between equal priorities so nodes are never compared
+    order = itertools.count()
+    for start in starts:
+        if start in distances:
+            continue
+        distances[start] = 0
+        estimate = heuristic(start) if heuristic is not None else 0
+        heapq.heappush(heap, (estimate, next(order), 0, start))
+    expanded = 0
+    while heap:
+        _, _, cost, node = heapq.heappop(heap)
+        if cost > distances[node]:
+            continue
+        if goal is not None and goal(node):
+            return Result(node, cost, distances, expanded)
+        expanded += 1
+        for neighbour, step in neighbours(node):
+            new_cost = cost + step
+            if new_cost >= distances.get(neighbour, new_cost + 1):
+                continue
+            distances[neighbour] = new_cost
+            estimate = new_cost
+            if heuristic is not None:
+                estimate += heuristic(neighbour)
+            heapq.heappush(heap, (estimate, next(order), new_cost, neighbour))
+    return Result(None, None, distances, expanded)
+
+
+def dijkstra(starts, neighbours, goal=None):
+    """Shortest paths, where neighbours(node) gives (neighbour, cost)
+    pairs with costs that aren't negative"""
+    return astar(starts, neighbours, goal)